@@ -6,6 +6,12 @@ import plotly.express as px
 from io import BytesIO
 from backend.db import feedbacks, global_issues, db
 from backend.auth import authenticate_user, create_user, users_collection
+from backend.rollups import rollups_built
+from backend.dashboard import (
+    user_departments, scope_filter, rollup_scope, totals, top_issues, analyzed_districts,
+    category_counts, constituencies, feedback_count, feedback_rows, detail_row, write_feedback_export,
+    DETAIL_COLUMNS, DETAIL_PAGE_SIZE
+)
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Admin Dashboard", page_icon="🔒", layout="wide")
@@ -56,11 +62,7 @@ access_districts = user["access"]
 
 # --- NEW: Handle Multiple Departments ---
 # Data pazhaya format-la string-a irundha list-a maathikkom
-raw_category = user.get("role_category", ["All Categories"])
-if isinstance(raw_category, str):
-    user_depts = [raw_category]
-else:
-    user_depts = raw_category
+user_depts = user_departments(user)
 
 # Display String (Eg: "Water, Road")
 dept_display = ", ".join(user_depts) if isinstance(user_depts, list) else str(user_depts)
@@ -223,30 +225,18 @@ st.markdown("---")
 # =====================================================
 # 🌍 DATA FILTERING LOGIC (UPDATED FOR MULTI-DEPT)
 # =====================================================
-raw_data = list(feedbacks.find().sort("created_at", -1))
-
-# 1. Filter by District
-if role == "super_admin":
-    all_data = raw_data
-else:
-    all_data = [d for d in raw_data if d.get("location", {}).get("district") in access_districts]
-
-# 2. Filter by Department Role (UPDATED)
-# Logic: Show data IF "All Categories" is in user's list OR issue category is in user's list
-if role != "super_admin":
-    # Ensure user_depts is a list
-    current_user_depts = user.get("role_category", ["All Categories"])
-    if isinstance(current_user_depts, str):
-        current_user_depts = [current_user_depts]
-
-    if "All Categories" not in current_user_depts:
-        all_data = [d for d in all_data if d.get("ai", {}).get("category") in current_user_depts]
-
-analyzed_feedbacks = [fb for fb in all_data if fb.get("ai")]
-
-total_received = len(all_data)
-total_analyzed = len(analyzed_feedbacks)
-pending_count = total_received - total_analyzed
+# District access + departments become one Mongo filter; counts come from the rollups
+scope = scope_filter(user)
+rscope = rollup_scope(user)
+counts = totals(rscope)
+
+total_received = counts["received"]
+total_analyzed = counts["analyzed"]
+pending_count = counts["pending"]
+districts_with_data = analyzed_districts(rscope)
+if not rollups_built():
+    st.warning("Counts only cover feedback analyzed since rollups were enabled. "
+               "Run `python -m backend.rollups rebuild` once to count the history.")
 
 # =====================================================
 # DASHBOARD UI
@@ -267,62 +257,22 @@ st.markdown("---")
 # =====================================================
 st.subheader("🔥 Top Critical Issues (Grouped by Problem)")
 
-if not analyzed_feedbacks:
+if not total_analyzed:
     st.info("✅ No issues reported yet.")
 else:
-    grouped_issues = {}
-
-    for fb in analyzed_feedbacks:
-        ai_data = fb.get("ai", {})
-        loc_data = fb.get("location", {})
-        
-        issue_name = ai_data.get("main_issue", "Unknown Issue")
-        category = ai_data.get("category", "General")
-        priority = ai_data.get("priority", "LOW")
-        district = loc_data.get("district", "Unknown")
-        user_name = fb.get("user", {}).get("name", "Anonymous")
-
-        unique_key = f"{category}_{issue_name}"
-
-        if unique_key in grouped_issues:
-            grouped_issues[unique_key]["total_reports"] += 1
-            grouped_issues[unique_key]["users"].append(user_name)
-            grouped_issues[unique_key]["districts"].add(district)
-            
-            prio_map = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
-            existing_prio_val = prio_map.get(grouped_issues[unique_key]["priority"], 1)
-            new_prio_val = prio_map.get(priority, 1)
-            
-            if new_prio_val > existing_prio_val:
-                grouped_issues[unique_key]["priority"] = priority
-                
-        else:
-            grouped_issues[unique_key] = {
-                "issue_text": issue_name,
-                "category": category,
-                "districts": {district},
-                "priority": priority,
-                "total_reports": 1,
-                "users": [user_name]
-            }
-
-    final_issue_list = list(grouped_issues.values())
-    priority_map = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
-    final_issue_list.sort(key=lambda x: (priority_map.get(x["priority"], 1), x["total_reports"]), reverse=True)
-
-    for issue in final_issue_list:
+    for issue in top_issues(scope):
         name = issue["issue_text"]
         count = issue["total_reports"]
         prio = issue["priority"]
         cat = issue["category"]
-        
-        dist_list = sorted(list(issue["districts"]))
+
+        dist_list = issue["districts"]
         if len(dist_list) > 3:
             dist_str = ", ".join(dist_list[:3]) + f" (+{len(dist_list)-3} others)"
         else:
             dist_str = ", ".join(dist_list)
 
-        user_list = list(set(issue["users"]))
+        user_list = issue["users"]
 
         with st.container(border=True):
             c1, c2 = st.columns([5, 1])
@@ -331,8 +281,8 @@ else:
                 st.markdown(f"### {icon} {name}")
                 st.markdown(f"**📍 Locations:** {dist_str} | **📂 Dept:** {cat}")
                 
-                if len(user_list) > 3:
-                    display_users = ", ".join(user_list[:3]) + f" and {len(user_list)-3} others"
+                if count > len(user_list):
+                    display_users = ", ".join(user_list) + f" and {count - len(user_list)} others"
                 else:
                     display_users = ", ".join(user_list)
                 
@@ -349,43 +299,22 @@ st.markdown("---")
 st.subheader("📊 Feedback Distribution by Department (District-wise)")
 st.caption("Select a district to view department-wise complaint distribution")
 
-if not analyzed_feedbacks:
+if not total_analyzed:
     st.info("No analyzed feedbacks available for visualization.")
 else:
-    # Extract available districts from analyzed data
-    available_districts = sorted({
-        fb.get("location", {}).get("district")
-        for fb in analyzed_feedbacks
-        if fb.get("location", {}).get("district")
-    })
-
     selected_district = st.selectbox(
         "📍 Select District",
-        options=["All Districts"] + available_districts
+        options=["All Districts"] + districts_with_data
     )
 
-    # Filter data based on selected district
-    if selected_district != "All Districts":
-        district_data = [
-            fb for fb in analyzed_feedbacks
-            if fb.get("location", {}).get("district") == selected_district
-        ]
-    else:
-        district_data = analyzed_feedbacks
+    category_rows = category_counts(
+        rscope, None if selected_district == "All Districts" else selected_district
+    )
 
-    if not district_data:
+    if not category_rows:
         st.warning("No feedback data available for this district.")
     else:
-        categories = [
-            fb.get("ai", {}).get("category", "Other")
-            for fb in district_data
-        ]
-
-        df_cat = (
-            pd.DataFrame(categories, columns=["Department"])
-            .value_counts()
-            .reset_index(name="Count")
-        )
+        df_cat = pd.DataFrame(category_rows, columns=["Department", "Count"])
 
         col_chart, col_table = st.columns([3, 1])
 
@@ -429,21 +358,15 @@ else:
 st.subheader("📊 Feedback Distribution by Department")
 st.caption("Select District and Constituency to analyze department-wise complaints")
 
-if not analyzed_feedbacks:
+if not total_analyzed:
     st.info("No analyzed feedbacks available for visualization.")
 else:
     # -------------------------------
     # District Selection
     # -------------------------------
-    districts = sorted({
-        fb.get("location", {}).get("district")
-        for fb in analyzed_feedbacks
-        if fb.get("location", {}).get("district")
-    })
-
     selected_district = st.selectbox(
         "📍 Select District",
-        options=["Select District"] + districts
+        options=["Select District"] + districts_with_data
     )
 
     if selected_district == "Select District":
@@ -453,43 +376,24 @@ else:
     # -------------------------------
     # Constituency Selection
     # -------------------------------
-    constituencies = sorted({
-        fb.get("location", {}).get("constituency")
-        for fb in analyzed_feedbacks
-        if fb.get("location", {}).get("district") == selected_district
-        and fb.get("location", {}).get("constituency")
-    })
-
     selected_constituency = st.selectbox(
         "🏛️ Select Constituency",
-        options=["All Constituencies"] + constituencies
+        options=["All Constituencies"] + constituencies(rscope, selected_district)
     )
 
     # -------------------------------
-    # Filter Data
+    # Count from the rollups
     # -------------------------------
-    filtered_data = [
-        fb for fb in analyzed_feedbacks
-        if fb.get("location", {}).get("district") == selected_district
-        and (
-            selected_constituency == "All Constituencies"
-            or fb.get("location", {}).get("constituency") == selected_constituency
-        )
-    ]
+    category_rows = category_counts(
+        rscope,
+        selected_district,
+        None if selected_constituency == "All Constituencies" else selected_constituency
+    )
 
-    if not filtered_data:
+    if not category_rows:
         st.warning("No feedback data available for this selection.")
     else:
-        categories = [
-            fb.get("ai", {}).get("category", "Other")
-            for fb in filtered_data
-        ]
-
-        df_cat = (
-            pd.DataFrame(categories, columns=["Department"])
-            .value_counts()
-            .reset_index(name="Count")
-        )
+        df_cat = pd.DataFrame(category_rows, columns=["Department", "Count"])
 
         col_chart, col_table = st.columns([3, 1])
 
@@ -532,63 +436,45 @@ else:
 if st.checkbox("📂 Click to Show Detailed Data & Download"):
     st.subheader("📋 District-wise Feedback Data")
 
-    if not analyzed_feedbacks:
+    col_f1, col_f2 = st.columns([3, 1])
+    with col_f1:
+        selected_district = st.selectbox("Filter by District:", ["All Districts"] + districts_with_data)
+    detail_district = None if selected_district == "All Districts" else selected_district
+
+    total_rows = feedback_count(scope, detail_district)
+    if not total_rows:
         st.warning("No verified data available yet.")
     else:
-        rows = []
-        for fb in analyzed_feedbacks:
-            user = fb.get("user", {})
-            location = fb.get("location", {})
-            ai = fb.get("ai", {})
-
-            rows.append({
-                "Name": user.get("name", "N/A"),
-                "District": location.get("district", "N/A"),
-                "Category": ai.get("category", "N/A"),
-                "Priority": ai.get("priority", "N/A"),
-                "Issue": ai.get("main_issue", "N/A"),
-                "Feedback": fb.get("feedback", {}).get("original_text", ""),
-                "Date": fb.get("created_at", "")
-            })
-
-        df = pd.DataFrame(rows)
-
-        col_f1, col_f2 = st.columns([3, 1])
-        with col_f1:
-            districts = sorted(df["District"].unique().tolist())
-            selected_district = st.selectbox("Filter by District:", ["All Districts"] + districts)
-
-        if selected_district != "All Districts":
-            filtered_df = df[df["District"] == selected_district]
-        else:
-            filtered_df = df
-
-        def convert_df_to_excel(dataframe):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                dataframe.to_excel(writer, index=False, sheet_name="Feedbacks")
-            return output.getvalue()
-        
-        excel_data = convert_df_to_excel(filtered_df)
+        pages = -(-total_rows // DETAIL_PAGE_SIZE)
+        page = 0
+        if pages > 1:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) - 1
+        analyzed_feedbacks = feedback_rows(scope, detail_district, page)
+        first_row = page * DETAIL_PAGE_SIZE + 1
+        st.caption(
+            f"Showing reports {first_row}–{first_row + len(analyzed_feedbacks) - 1} of {total_rows}, newest first. "
+            "The Excel export includes all of them."
+        )
 
         with col_f2:
             st.write("")
             st.write("")
-            st.download_button(
-                label="⬇️ Download Excel",
-                data=excel_data,
-                file_name=f"report.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-
+            if st.button(f"📄 Prepare Excel ({total_rows} rows)", use_container_width=True):
+                export = BytesIO()
+                write_feedback_export(scope, export, detail_district)
+                st.download_button(
+                    label="⬇️ Download Excel",
+                    data=export.getvalue(),
+                    file_name=f"report.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+
+        filtered_df = pd.DataFrame([detail_row(fb) for fb in analyzed_feedbacks], columns=DETAIL_COLUMNS)
         st.dataframe(filtered_df, use_container_width=True, hide_index=True)
         
         st.write("### 🗂️ Individual Feedback Analysis")
         for fb in analyzed_feedbacks:
-            if selected_district != "All Districts" and fb.get("location", {}).get("district") != selected_district:
-                continue
-                
             ai = fb.get("ai", {})
             p_emoji = "🔴" if ai.get("priority") == "CRITICAL" else "🟠" if ai.get("priority") == "HIGH" else "🔵"
             
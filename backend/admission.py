@@ -0,0 +1,238 @@
+"""
+Admission control for the ingest API.
+
+Checks, in order:
+  1. global in-flight limit on process_feedback      -> 503
+  2. analysis lag (batches stuck in "processing")    -> 503
+  3. per-client token bucket                         -> 429
+  4. per-mobile_hash token bucket                    -> 429
+
+Bulk uploads take the in-flight slot and lag check per request, but pay
+for every record: one token from the client's bulk bucket and one from
+the record's mobile bucket (charge_records); records over the limit are
+rejected individually.
+
+Buckets live in memory by default. With ADMISSION_SHARED=1 the per-key
+limits use fixed-window counters in Mongo (rate_limits, TTL-indexed) so
+all nodes share them. Shed requests are counted in SHED.
+
+The client is the connecting address. X-Forwarded-For is only honoured
+when that address is one of TRUSTED_PROXIES (comma-separated IPs or
+CIDRs), and then the client is the last hop not in that list.
+"""
+import asyncio
+import ipaddress
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+# ---------------- CONFIG ----------------
+MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", 200))
+MAX_PROCESSING_BATCHES = int(os.getenv("ADMISSION_MAX_PROCESSING_BATCHES", 500))
+LAG_CHECK_SECONDS = float(os.getenv("ADMISSION_LAG_CHECK_SECONDS", 5))
+CLIENT_RATE = float(os.getenv("RATE_CLIENT_PER_MIN", 60)) / 60      # tokens per second
+CLIENT_BURST = int(os.getenv("RATE_CLIENT_BURST", 20))
+MOBILE_RATE = float(os.getenv("RATE_MOBILE_PER_HOUR", 10)) / 3600
+MOBILE_BURST = int(os.getenv("RATE_MOBILE_BURST", 5))
+BULK_CLIENT_RATE = float(os.getenv("RATE_BULK_CLIENT_PER_MIN", 2000)) / 60  # records per second
+BULK_CLIENT_BURST = int(os.getenv("RATE_BULK_CLIENT_BURST", 5000))
+SHARED = os.getenv("ADMISSION_SHARED", "0") == "1"
+
+
+def parse_networks(value):
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+
+TRUSTED_PROXIES = parse_networks(os.getenv("TRUSTED_PROXIES", ""))
+
+SHED = {"inflight": 0, "lag": 0, "client_rate": 0, "mobile_rate": 0}
+ADMITTED = {"total": 0}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+# ---------------- IN-MEMORY TOKEN BUCKETS ----------------
+class TokenBuckets:
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, last_refill)
+
+    def take(self, key, now=None):
+        """Returns 0 if a token was taken, else seconds until one is available."""
+        return self.take_n(key, 1, now)[1]
+
+    def take_n(self, key, n, now=None):
+        """Takes up to n tokens; returns (taken, seconds until the next one if short)."""
+        now = now or time.monotonic()
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        granted = min(n, int(tokens))
+        tokens -= granted
+        self._buckets[key] = (tokens, now)
+        if granted and len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return granted, 0 if granted == n else (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [k for k, (t, last) in self._buckets.items() if t + (now - last) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+
+
+_client_buckets = TokenBuckets(CLIENT_RATE, CLIENT_BURST)
+_mobile_buckets = TokenBuckets(MOBILE_RATE, MOBILE_BURST)
+_bulk_buckets = TokenBuckets(BULK_CLIENT_RATE, BULK_CLIENT_BURST)
+
+
+# ---------------- CLIENT ADDRESS ----------------
+def _trusted(address, proxies):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_address(peer, forwarded=None, proxies=None):
+    """
+    The address rate limits are keyed on. X-Forwarded-For is anyone's to
+    write, so it only counts when the peer is a trusted proxy; hops are
+    then read right to left, skipping further trusted proxies.
+    """
+    proxies = TRUSTED_PROXIES if proxies is None else proxies
+    if not forwarded or not peer or not _trusted(peer, proxies):
+        return peer or "unknown"
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+# ---------------- SHARED (MONGO) WINDOWS ----------------
+async def _take_shared(kind, key, rate, burst, n=1):
+    """Fixed window sized so one window allows `burst` requests at `rate`; returns (taken, wait)."""
+    from backend.async_db import adb
+
+    window = burst / rate
+    now = time.time()
+    start = int(now // window)
+    doc = await adb["rate_limits"].find_one_and_update(
+        {"_id": f"{kind}:{key}:{start}"},
+        {
+            "$inc": {"count": n},
+            "$setOnInsert": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=window * 2)}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    granted = max(0, min(n, burst - (doc["count"] - n)))
+    return granted, 0 if granted == n else (start + 1) * window - now
+
+
+async def _take(kind, key, buckets, n=1):
+    if SHARED:
+        return await _take_shared(kind, key, buckets.rate, buckets.burst, n)
+    return buckets.take_n(key, n)
+
+
+# ---------------- LAG SIGNAL ----------------
+_lag = {"processing": 0, "checked": 0.0}
+_lag_lock = asyncio.Lock()
+
+
+async def processing_batches():
+    """Count of batches waiting on analysis, refreshed at most every LAG_CHECK_SECONDS."""
+    if time.monotonic() - _lag["checked"] < LAG_CHECK_SECONDS:
+        return _lag["processing"]
+    async with _lag_lock:
+        if time.monotonic() - _lag["checked"] >= LAG_CHECK_SECONDS:
+            from backend.async_db import batches
+
+            _lag["processing"] = await batches.count_documents({"status": "processing"})
+            _lag["checked"] = time.monotonic()
+    return _lag["processing"]
+
+
+# ---------------- ADMISSION ----------------
+_inflight = {"count": 0}
+
+
+def _shed(reason, status_code, retry_after):
+    SHED[reason] += 1
+    raise Rejected(status_code, reason, retry_after)
+
+
+@asynccontextmanager
+async def admit(client_key, mobile_hash=None, per_record=False):
+    """
+    Raises Rejected, or holds an in-flight slot for the duration of the
+    block. per_record=True (bulk uploads) skips the request's token buckets;
+    the caller charges every record with charge_records instead.
+    """
+    if _inflight["count"] >= MAX_INFLIGHT:
+        _shed("inflight", 503, 1)
+    # Take the slot before the first await, so requests arriving meanwhile see it
+    _inflight["count"] += 1
+    try:
+        if await processing_batches() > MAX_PROCESSING_BATCHES:
+            _shed("lag", 503, LAG_CHECK_SECONDS * 2)
+
+        if not per_record:
+            _, wait = await _take("client", client_key, _client_buckets)
+            if wait:
+                _shed("client_rate", 429, wait)
+            if mobile_hash:
+                _, wait = await _take("mobile", mobile_hash, _mobile_buckets)
+                if wait:
+                    _shed("mobile_rate", 429, wait)
+
+        ADMITTED["total"] += 1
+        yield
+    finally:
+        _inflight["count"] -= 1
+
+
+async def charge_records(client_key, mobile_hashes):
+    """
+    Rate limits for the records of a bulk upload, in order: one token each
+    from the client's bulk bucket and from the record's mobile bucket.
+    Returns one shed reason per record (None = admitted).
+    """
+    granted, _ = await _take("bulk_client", client_key, _bulk_buckets, len(mobile_hashes))
+    reasons = [None] * granted + ["client_rate"] * (len(mobile_hashes) - granted)
+
+    by_mobile = {}
+    for idx, mobile_hash in enumerate(mobile_hashes[:granted]):
+        if mobile_hash:
+            by_mobile.setdefault(mobile_hash, []).append(idx)
+    for mobile_hash, idxs in by_mobile.items():
+        taken, _ = await _take("mobile", mobile_hash, _mobile_buckets, len(idxs))
+        for idx in idxs[taken:]:
+            reasons[idx] = "mobile_rate"
+
+    for reason in reasons:
+        if reason:
+            SHED[reason] += 1
+    return reasons
+
+
+def stats():
+    return {
+        "inflight": _inflight["count"],
+        "processing_batches": _lag["processing"],
+        "admitted": ADMITTED["total"],
+        "shed": dict(SHED),
+    }
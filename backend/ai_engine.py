@@ -1,4 +1,125 @@
+import hashlib
+import json
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# =========================
+# 0. KEYWORD MATCHER
+# =========================
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+_VOWELS = set("aeiou")
+_SYLLABLE_RE = re.compile(r"[aeiou]+")
+
+
+def _inflections(word):
+    """
+    Regular inflections of a keyword token: plurals, -ed / -ing and -ous.
+    Generated from the keyword rather than stripped off the input, so an
+    unrelated word that merely ends the same way ("policy", "busy") is
+    never folded onto a keyword.
+    """
+    forms = {word + "ous"}
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        forms.add(word + "es")
+    else:
+        forms.add(word + "s")
+    if word.endswith("e"):
+        forms |= {word + "d", word[:-1] + "ing", word[:-1] + "ous"}
+    elif word.endswith("y") and len(word) > 2 and word[-2] not in _VOWELS:
+        forms |= {word[:-1] + "ies", word[:-1] + "ied", word + "ing"}
+    elif (len(_SYLLABLE_RE.findall(word)) == 1 and word[-1] not in _VOWELS | set("wxy")
+          and word[-2] in _VOWELS and word[-3] not in _VOWELS):
+        forms |= {word + word[-1] + "ing", word + word[-1] + "ed"}  # "cutting", not "cuting"
+    else:
+        forms |= {word + "ed", word + "ing"}
+    return forms
+
+
+# Generated forms that are words of their own, not inflections of the keyword
+_NOT_INFLECTIONS = frozenset({"training", "trained", "worsted"})
+
+
+class KeywordMatcher:
+    """
+    Token-level Aho-Corasick automaton built once from all keyword tables.
+    One scan returns every hit as {tag: set(keywords)}; matching works on
+    whole words, so "cut" never matches inside "execute". Regular
+    inflections of a keyword ("accidents", "buses", "dangerous") are mapped
+    back onto it before matching; see _inflections.
+    """
+
+    def __init__(self, tables):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        vocab = set()
+        for tag, keywords in tables.items():
+            for keyword in keywords:
+                phrase = tuple(tokenize(keyword))
+                vocab.update(phrase)
+                self._add(phrase, (tag, keyword))
+        self._build()
+
+        self._canonical = {}
+        for word in sorted(vocab):
+            for form in _inflections(word):
+                if form not in vocab and form not in _NOT_INFLECTIONS:
+                    self._canonical.setdefault(form, word)
+
+    def canonical(self, token):
+        """The keyword token this word is an inflection of, else the word itself."""
+        return self._canonical.get(token, token)
+
+    def _add(self, phrase, hit):
+        state = 0
+        for token in phrase:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(hit)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan_tokens(self, tokens):
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = {}
+        state = 0
+        canonical = self.canonical
+        for token in tokens:
+            token = canonical(token)
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for tag, keyword in out[state]:
+                hits.setdefault(tag, set()).add(keyword)
+        return hits
+
+    def scan(self, text):
+        return self.scan_tokens(tokenize(text))
+
 
 # =========================
 # 1. LANGUAGE DETECTION
@@ -9,49 +130,113 @@ TAMIL_KEYWORDS = [
     "current", "cut", "seri illa", "neraya", "konjam", "problem", "varudhu"
 ]
 
-def detect_language(text):
-    text_lower = text.lower()
-    tamil_count = 0
-    for word in TAMIL_KEYWORDS:
-        if word in text_lower:
-            tamil_count += 1
-    return "ta" if tamil_count >= 1 else "en"
+def detect_language(text, hits=None):
+    if hits is None:
+        hits = scan_keywords(text)
+    return "ta" if hits.get("tamil") else "en"
 
 
 # =========================
 # 2. OFFLINE TRANSLATION
 # =========================
-TAMIL_TO_ENGLISH = {
-    "thanni": "water", "varala": "not coming", "varudhu": "is coming",
-    "romba": "very", "kastam": "difficult", "iruku": "is", "illa": "no",
-    "kuppai": "garbage", "sutham": "cleanliness", "mosam": "bad",
-    "road": "road", "current": "power", "cut": "cut", "velai": "work",
-    "office": "office", "neraya": "a lot", "konjam": "little",
-    "problem": "problem", "seri": "okay", "worst": "worst",
-    "danger": "danger", "school": "school", "hospital": "hospital"
-}
+# Tanglish -> English lexicon (single words and multi-word phrases) lives in a
+# data file so it can grow to thousands of entries without touching code.
+# JSON: {"thanni varala": "water is not coming", ...}  TSV: phrase<TAB>meaning
+LEXICON_PATH = os.getenv(
+    "TANGLISH_LEXICON",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tanglish_lexicon.json")
+)
 
-COMMON_PHRASES = {
-    "thanni varala": "water is not coming",
-    "romba kastama iruku": "it is very difficult",
-    "sutham illa": "there is no cleanliness",
-    "current cut": "power cut",
-    "velai illa": "no work"
-}
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_TRIE_END = ""  # tokens are never empty, so "" is safe as the terminal key
 
-def translate_to_english(text):
-    text_lower = text.lower()
-    for phrase, meaning in COMMON_PHRASES.items():
-        text_lower = text_lower.replace(phrase, meaning)
-    
-    words = text_lower.split()
+def load_lexicon(path):
+    if path.endswith(".tsv"):
+        lexicon = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                phrase, meaning = line.rstrip("\n").split("\t", 1)
+                lexicon[phrase] = meaning
+        return lexicon
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def build_phrase_trie(lexicon):
+    root = {}
+    for phrase, meaning in lexicon.items():
+        node = root
+        for token in phrase.lower().split():
+            node = node.setdefault(token, {})
+        node[_TRIE_END] = tuple(meaning.split())
+    return root
+
+def _trie_leaves(node):
+    # JSON has no tuples; give terminal entries back their original type
+    if _TRIE_END in node:
+        node[_TRIE_END] = tuple(node[_TRIE_END])
+    return node
+
+def load_phrase_trie(path):
+    """
+    Returns the compiled token trie for a lexicon file. The compiled trie is
+    cached next to the source as plain JSON, keyed by the sha256 of the
+    source, and reused while the hash matches. JSON keeps a tampered cache
+    from running code the way a pickle could.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    cache_path = path + ".trie.json"
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f, object_hook=_trie_leaves)
+        if isinstance(cached, dict) and cached.get("sha256") == digest:
+            return cached["trie"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    trie = build_phrase_trie(load_lexicon(path))
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"sha256": digest, "trie": trie}, f, ensure_ascii=False, separators=(",", ":"))
+    except OSError:
+        pass  # read-only install: just use the in-memory trie
+    return trie
+
+PHRASE_TRIE = load_phrase_trie(LEXICON_PATH)
+
+def normalize_words(text):
+    return [w for w in (_PUNCT_RE.sub("", word) for word in text.lower().split()) if w]
+
+def translate_words(text):
+    """
+    Lowercases and splits the text once and returns the English word list.
+    Greedy longest match over the phrase trie in one left-to-right pass.
+    """
+    words = normalize_words(text)
     translated_words = []
-    for word in words:
-        clean_word = re.sub(r"[^\w\s]", "", word)
-        translated_word = TAMIL_TO_ENGLISH.get(clean_word, clean_word)
-        translated_words.append(translated_word)
-    
-    return " ".join(translated_words).capitalize()
+    i, n = 0, len(words)
+    while i < n:
+        node, j = PHRASE_TRIE, i
+        meaning, end = None, i
+        while j < n:
+            node = node.get(words[j])
+            if node is None:
+                break
+            j += 1
+            if _TRIE_END in node:
+                meaning, end = node[_TRIE_END], j
+        if meaning is None:
+            translated_words.append(words[i])
+            i += 1
+        else:
+            translated_words.extend(meaning)
+            i = end
+    return translated_words
+
+def translate_to_english(text):
+    return " ".join(translate_words(text)).capitalize()
 
 
 # =========================
@@ -69,16 +254,23 @@ CATEGORY_KEYWORDS = {
     "Safety": ["danger", "accident", "risk", "theft", "police", "dark"]
 }
 
-def detect_category(text):
-    text_lower = text.lower()
-    scores = {}
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = sum(1 for word in keywords if word in text_lower)
-        scores[category] = score
-    
+# Per-keyword weights so specific words can outweigh generic ones,
+# e.g. {"pothole": 2.0}. Keywords not listed count 1.0.
+CATEGORY_KEYWORD_WEIGHTS = {}
+
+def category_from_hits(hits):
+    scores = {
+        category: sum(CATEGORY_KEYWORD_WEIGHTS.get(word, 1.0) for word in hits.get(("category", category), ()))
+        for category in CATEGORY_KEYWORDS
+    }
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "Other"
 
+def detect_category(text, hits=None):
+    if hits is None:
+        hits = scan_keywords(text)
+    return category_from_hits(hits)
+
 
 # =========================
 # 4. PRIORITY DETECTION
@@ -86,14 +278,42 @@ def detect_category(text):
 HIGH_PRIORITY_WORDS = ["urgent", "danger", "accident", "risk", "critical", "worst", "life threat"]
 MEDIUM_PRIORITY_WORDS = ["problem", "issue", "bad", "delay", "ignored", "kastam"]
 
-def detect_priority(text):
-    text_lower = text.lower()
-    if re.search(r"\b\d+\s*(day|days|week|weeks)\b", text_lower):
+# Built once at import from every table above; all detectors share one scan.
+KEYWORD_MATCHER = KeywordMatcher({
+    "tamil": TAMIL_KEYWORDS,
+    "high": HIGH_PRIORITY_WORDS,
+    "medium": MEDIUM_PRIORITY_WORDS,
+    **{("category", category): keywords for category, keywords in CATEGORY_KEYWORDS.items()}
+})
+
+def scan_keywords(text):
+    return KEYWORD_MATCHER.scan(text)
+
+_DURATION_TOKEN_RE = re.compile(r"\d+(?:day|days|week|weeks)|\d+")
+_DURATION_UNITS = {"day", "days", "week", "weeks"}
+
+def has_duration(words):
+    # "3days", "3 days" or "3-days" (the hyphen splits into two tokens)
+    for i, word in enumerate(words):
+        match = _DURATION_TOKEN_RE.fullmatch(word)
+        if match and (word[-1].isalpha() or (i + 1 < len(words) and words[i + 1] in _DURATION_UNITS)):
+            return True
+    return False
+
+def priority_from(words, hits):
+    """The one priority rule: a stated duration or a high word, then medium words."""
+    if has_duration(words) or hits.get("high"):
         return "High"
-    if any(w in text_lower for w in HIGH_PRIORITY_WORDS): return "High"
-    if any(w in text_lower for w in MEDIUM_PRIORITY_WORDS): return "Medium"
+    if hits.get("medium"):
+        return "Medium"
     return "Low"
 
+def detect_priority(text, hits=None):
+    words = tokenize(text)
+    if hits is None:
+        hits = KEYWORD_MATCHER.scan_tokens(words)
+    return priority_from(words, hits)
+
 
 # =========================
 # 5. MAIN ISSUE MAPPING
@@ -121,22 +341,151 @@ def generate_summary(text):
 # =========================
 # 6. MAIN FUNCTION (CONNECTED)
 # =========================
-def analyze_feedback_batch(feedback_list):
+def analyze_feedback(text):
+    """
+    Fused analyzer: tokenizes once and derives category, priority,
+    main_issue and summary from the same English word stream.
+    """
+    words = translate_words(text)
+    hits = KEYWORD_MATCHER.scan_tokens(words)
+    category = category_from_hits(hits)
+
+    priority = priority_from(words, hits)
+
+    summary = " ".join(words[:15]).capitalize()
+    if len(words) > 15:
+        summary += "..."
+
+    return {
+        "category": category,
+        "priority": priority,
+        "main_issue": extract_main_issue(category),
+        "summary": summary
+    }
+
+def analyze_feedback_stream(feedback_iterable):
+    """
+    Lazily yields one analysis result per feedback text.
+    Use this for backfills so input and output never sit in memory together.
+    """
+    for text in feedback_iterable:
+        yield analyze_feedback(text)
+
+# =========================
+# 7. PARALLEL MODE (OPT-IN)
+# =========================
+AI_WORKERS = int(os.getenv("AI_WORKERS", os.cpu_count() or 1))
+AI_CHUNK_SIZE = int(os.getenv("AI_CHUNK_SIZE", 500))
+AI_PARALLEL_MIN_BATCH = int(os.getenv("AI_PARALLEL_MIN_BATCH", 2000))
+
+_pool = None
+_pool_workers = None
+
+def _warm_worker():
+    # Touch the tables and automaton once so the first real chunk does not pay for it
+    analyze_feedback("thanni varala current cut 3 days")
+
+def _analyze_chunk(chunk):
+    return [analyze_feedback(text) for text in chunk]
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        _pool_workers = workers
+    return _pool
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def analyze_feedback_batch(feedback_list, parallel=False, workers=None, chunk_size=None, backend=None):
     """
     Processes a list of feedbacks and returns analysis results.
+    With parallel=True, large batches are chunked across a process pool;
+    small batches stay serial since fork and pickling would dominate.
+    `backend` picks the classifier: None follows AI_BACKEND, or pass a name
+    ("keyword", "ngram") or a backend from backend.classifiers. Only the
+    keyword engine uses the process pool.
     """
+    if backend != "keyword":
+        from backend.classifiers import resolve_backend
+
+        resolved = resolve_backend(backend)
+        if resolved.name != "keyword":
+            return resolved.analyze(list(feedback_list))
+
+    workers = workers or AI_WORKERS
+    chunk_size = chunk_size or AI_CHUNK_SIZE
+    if not parallel or workers < 2 or len(feedback_list) < AI_PARALLEL_MIN_BATCH:
+        return list(analyze_feedback_stream(feedback_list))
+
     results = []
-    for text in feedback_list:
-        eng_text = translate_to_english(text)
-        category = detect_category(eng_text)
-        priority = detect_priority(eng_text)
-        main_issue = extract_main_issue(category)
-        summary = generate_summary(eng_text)
-        
-        results.append({
-            "category": category,
-            "priority": priority,
-            "main_issue": main_issue,
-            "summary": summary
-        })
-    return results
\ No newline at end of file
+    # executor.map keeps chunk order, so output order matches input order
+    for chunk_results in _get_pool(workers).map(_analyze_chunk, _chunks(list(feedback_list), chunk_size)):
+        results.extend(chunk_results)
+    return results
+
+
+# =========================
+# 8. VECTORIZED CATEGORY SCORING (BATCH)
+# =========================
+_WEIGHT_MATRICES = {}  # frozen weights -> (columns, matrix), built once per weights table
+
+def _category_weight_matrix(weights):
+    key = tuple(sorted(weights.items()))
+    cached = _WEIGHT_MATRICES.get(key)
+    if cached is None:
+        cached = _WEIGHT_MATRICES[key] = _build_category_weight_matrix(weights)
+    return cached
+
+def _build_category_weight_matrix(weights):
+    import numpy as np
+
+    columns = {}
+    for keywords in CATEGORY_KEYWORDS.values():
+        for word in keywords:
+            columns.setdefault(word, len(columns))
+
+    matrix = np.zeros((len(columns), len(CATEGORY_KEYWORDS)))
+    for col, (category, keywords) in enumerate(CATEGORY_KEYWORDS.items()):
+        for word in keywords:
+            matrix[columns[word], col] = weights.get(word, 1.0)
+    return columns, matrix
+
+def detect_category_batch(token_lists, weights=None):
+    """
+    Batched detect_category for backfills: builds a sparse document x keyword
+    matrix, multiplies it by the keyword x category weight matrix and takes
+    the row-wise argmax ("Other" for rows with no hits).
+    Takes token lists as returned by translate_words. Needs numpy and scipy.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    weights = CATEGORY_KEYWORD_WEIGHTS if weights is None else weights
+    columns, weight_matrix = _category_weight_matrix(weights)
+
+    indptr, indices = [0], []
+    for tokens in token_lists:
+        hits = KEYWORD_MATCHER.scan_tokens(tokens)
+        found = {
+            columns[word]
+            for category in CATEGORY_KEYWORDS
+            for word in hits.get(("category", category), ())
+        }
+        indices.extend(found)
+        indptr.append(len(indices))
+
+    docs = csr_matrix(
+        (np.ones(len(indices)), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(columns))
+    )
+    scores = docs @ weight_matrix
+
+    labels = np.array(list(CATEGORY_KEYWORDS) + ["Other"], dtype=object)
+    best = scores.argmax(axis=1) if len(columns) else np.zeros(docs.shape[0], dtype=np.int64)
+    best = np.where(scores.max(axis=1) > 0, best, len(CATEGORY_KEYWORDS))
+    return labels[best].tolist()
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError
+
+from backend import ai_engine, metrics
+from backend.ai_engine import normalize_words
+from backend.classifiers import get_backend
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 50000))
+ANALYSIS_CACHE_MONGO = os.getenv("ANALYSIS_CACHE_MONGO", "0") == "1"
+ANALYSIS_CACHE_TTL_DAYS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", 30))
+
+
+# --------------------------------------------------
+# Keys
+# --------------------------------------------------
+def rules_version():
+    """
+    Hash of every table the analysis depends on. Any edit to the keyword
+    tables, weights or lexicon changes it, so old cache entries stop matching.
+    """
+    tables = {
+        "tamil": ai_engine.TAMIL_KEYWORDS,
+        "category": ai_engine.CATEGORY_KEYWORDS,
+        "weights": ai_engine.CATEGORY_KEYWORD_WEIGHTS,
+        "high": ai_engine.HIGH_PRIORITY_WORDS,
+        "medium": ai_engine.MEDIUM_PRIORITY_WORDS,
+        "lexicon": ai_engine.PHRASE_TRIE,
+    }
+    blob = json.dumps(tables, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+RULES_VERSION = rules_version()
+
+def fingerprint(text):
+    # Same normalization the analyzer applies, so equal fingerprints
+    # always give equal results
+    return hashlib.sha1(" ".join(normalize_words(text)).encode("utf-8")).hexdigest()
+
+def cache_key(text, backend=None):
+    backend = backend or get_backend()
+    return f"{RULES_VERSION}:{backend.version}:{fingerprint(text)}"
+
+
+# --------------------------------------------------
+# Level 1: bounded in-process LRU
+# --------------------------------------------------
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory = LRUCache(ANALYSIS_CACHE_SIZE)
+_mongo_stats = {"hits": 0, "misses": 0}
+_mongo_stats_lock = threading.Lock()  # batches are analyzed from a thread pool
+_mongo_ready = False
+
+
+# --------------------------------------------------
+# Level 2: optional Mongo collection with TTL
+# --------------------------------------------------
+def _mongo_collection():
+    global _mongo_ready
+    from backend.db import db
+
+    collection = db["analysis_cache"]
+    if not _mongo_ready:
+        collection.create_index(
+            "created_at", expireAfterSeconds=ANALYSIS_CACHE_TTL_DAYS * 24 * 3600
+        )
+        _mongo_ready = True
+    return collection
+
+
+def _cache_samples():
+    """cache_stats for /metrics; both tiers count once per text looked up, so their hit rates compare."""
+    with _mongo_stats_lock:
+        mongo_hits, mongo_misses = _mongo_stats["hits"], _mongo_stats["misses"]
+    lookups = "analysis_cache_lookups_total"
+    return [
+        ("analysis_cache_entries", "gauge", len(_memory), {}),
+        ("analysis_cache_evictions_total", "counter", _memory.evictions, {}),
+        (lookups, "counter", _memory.hits, {"tier": "memory", "result": "hit"}),
+        (lookups, "counter", _memory.misses, {"tier": "memory", "result": "miss"}),
+        (lookups, "counter", mongo_hits, {"tier": "mongo", "result": "hit"}),
+        (lookups, "counter", mongo_misses, {"tier": "mongo", "result": "miss"}),
+    ]
+
+
+metrics.register_collector(_cache_samples)
+
+
+def cache_stats():
+    with _mongo_stats_lock:
+        mongo_hits, mongo_misses = _mongo_stats["hits"], _mongo_stats["misses"]
+    return {
+        "version": RULES_VERSION,
+        "backend": get_backend().version,
+        "size": len(_memory),
+        "maxsize": _memory.maxsize,
+        "hits": _memory.hits,
+        "misses": _memory.misses,
+        "evictions": _memory.evictions,
+        "mongo_hits": mongo_hits,
+        "mongo_misses": mongo_misses,
+    }
+
+
+# --------------------------------------------------
+# Cached analysis
+# --------------------------------------------------
+def analyze_feedback_batch_cached(feedback_list, use_mongo=None):
+    """
+    Drop-in for analyze_feedback_batch that reuses results for texts seen
+    before (same normalized text, rules version and classifier backend).
+    """
+    use_mongo = ANALYSIS_CACHE_MONGO if use_mongo is None else use_mongo
+    backend = get_backend()
+    keys = [cache_key(text, backend) for text in feedback_list]
+    results = [_memory.get(key) for key in keys]
+
+    missing = {key for key, res in zip(keys, results) if res is None}
+    if missing and use_mongo:
+        found = {
+            doc["_id"]: doc["result"]
+            for doc in _mongo_collection().find({"_id": {"$in": list(missing)}})
+        }
+        # Per text, like the LRU: a batch with the same text twice is two lookups
+        looked_up = [key for key, res in zip(keys, results) if res is None]
+        hits = sum(1 for key in looked_up if key in found)
+        with _mongo_stats_lock:
+            _mongo_stats["hits"] += hits
+            _mongo_stats["misses"] += len(looked_up) - hits
+        for key, res in found.items():
+            _memory.put(key, res)
+        missing -= found.keys()
+        results = [res if res is not None else found.get(key) for key, res in zip(keys, results)]
+
+    if missing:
+        todo = {}
+        for key, text in zip(keys, feedback_list):
+            if key in missing:
+                todo.setdefault(key, text)
+        computed = dict(zip(todo, backend.analyze(list(todo.values()))))
+        for key, res in computed.items():
+            _memory.put(key, res)
+        if use_mongo:
+            now = datetime.now(timezone.utc)
+            try:
+                _mongo_collection().insert_many(
+                    [{"_id": key, "result": res, "created_at": now} for key, res in computed.items()],
+                    ordered=False
+                )
+            except BulkWriteError:
+                pass  # another worker cached the same text first
+        results = [res if res is not None else computed[key] for key, res in zip(keys, results)]
+
+    # Callers store these dicts on documents, so hand out copies
+    return [dict(res) for res in results]
@@ -0,0 +1,13 @@
+from pymongo import AsyncMongoClient
+
+from backend.db import MONGODB_URI, DB_NAME
+from backend.metrics import EVENT_LISTENERS
+
+# Async client for the FastAPI path (same database as backend.db)
+async_client = AsyncMongoClient(MONGODB_URI, event_listeners=EVENT_LISTENERS)
+adb = async_client[DB_NAME]
+
+# Collections
+feedbacks = adb["feedbacks"]
+batches = adb["batches"]
+jobs = adb["jobs"]
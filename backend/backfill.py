@@ -0,0 +1,234 @@
+"""
+Re-analyze stored feedbacks after the rules change, then rebuild global_issues.
+
+    python -m backend.backfill --dry-run          # how many would change?
+    python -m backend.backfill --workers 8 --max-ops 2000
+    python -m backend.backfill --restart          # ignore the saved checkpoint
+
+Already-analyzed feedbacks are streamed in _id order and the last _id of
+every finished page is checkpointed, so a crashed run resumes where it
+stopped (the run id defaults to the current rules version). Feedbacks
+still waiting in a batch are left to the batch. A dry run neither reads
+nor writes the checkpoint. Once every feedback is updated,
+global_issues, issue_reporters and feedback_rollups are rebuilt from
+scratch by aggregation into shadow collections and swapped in with a
+rename. Stop the analysis workers for the swap, or issues merged in
+between are lost.
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from backend.db import db, feedbacks, INDEXES
+from backend.ai_engine import analyze_feedback_batch
+from backend.analysis_cache import RULES_VERSION
+from backend.change_counter import bump
+from backend.classifiers import get_backend
+from backend.feedback_service import PRIORITY_PIPELINE, RECENT_REPORTERS, REPORTER_BUCKET_SIZE
+from backend.rollups import mark_rollups_built, rebuild_lease, rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+checkpoints = db["backfill_checkpoints"]
+
+
+# --------------------------------------------------
+# Throttle
+# --------------------------------------------------
+class Throttle:
+    """Sleeps just enough to keep writes under max_ops per second."""
+
+    def __init__(self, max_ops):
+        self.max_ops = max_ops
+        self.started = time.monotonic()
+        self.ops = 0
+
+    def wait(self, ops):
+        if not self.max_ops:
+            return
+        self.ops += ops
+        ahead = self.ops / self.max_ops - (time.monotonic() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+# --------------------------------------------------
+# Phase 1: re-analyze feedbacks
+# --------------------------------------------------
+def _analyzer(workers):
+    backend = get_backend()
+    return lambda texts: analyze_feedback_batch(texts, parallel=workers > 1, workers=workers, backend=backend)
+
+
+def reanalyze(run_id, page_size, workers, max_ops, dry_run, restart):
+    # A dry run always starts from the top and leaves the real checkpoint alone
+    state = None if restart or dry_run else checkpoints.find_one({"_id": run_id})
+    if state and state.get("phase") == "done":
+        logger.info("Run %s already finished", run_id)
+        return state
+    state = state or {
+        "_id": run_id, "last_id": None, "processed": 0,
+        "changed": 0, "changed_category": 0, "changed_priority": 0,
+        "phase": "reanalyze", "started_at": datetime.now(timezone.utc)
+    }
+    if state["last_id"] is not None:
+        logger.info("Resuming %s after _id %s (%d done)", run_id, state["last_id"], state["processed"])
+
+    analyze = _analyzer(workers)
+    throttle = Throttle(max_ops)
+    while True:
+        query = {"ai": {"$exists": True}}
+        if state["last_id"] is not None:
+            query["_id"] = {"$gt": state["last_id"]}
+        page = list(
+            feedbacks.find(query, {"feedback.original_text": 1, "ai": 1})
+            .sort("_id", 1)
+            .limit(page_size)
+        )
+        if not page:
+            break
+
+        results = analyze([doc["feedback"]["original_text"] for doc in page])
+        ops = []
+        for doc, res in zip(page, results):
+            old = doc.get("ai") or {}
+            if old == res:
+                continue
+            state["changed"] += 1
+            state["changed_category"] += old.get("category") != res["category"]
+            state["changed_priority"] += old.get("priority") != res["priority"]
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"ai": res}}))
+
+        if ops and not dry_run:
+            feedbacks.bulk_write(ops, ordered=False)
+            throttle.wait(len(ops))
+
+        state["last_id"] = page[-1]["_id"]
+        state["processed"] += len(page)
+        if not dry_run:
+            checkpoints.replace_one({"_id": run_id}, state, upsert=True)
+        logger.info("%d processed, %d changed", state["processed"], state["changed"])
+
+    return state
+
+
+# --------------------------------------------------
+# Phase 2: rebuild global issues into shadow collections
+# --------------------------------------------------
+ISSUE_KEY_EXPR = {
+    "$toLower": {
+        "$replaceAll": {
+            "input": {"$concat": [
+                {"$ifNull": ["$ai.category", "Other"]}, "_",
+                {"$ifNull": ["$ai.main_issue", "General Issue"]}
+            ]},
+            "find": " ",
+            "replacement": "_"
+        }
+    }
+}
+
+REPORTER_EXPR = {"name": "$user.name", "mobile": "$user.mobile_masked", "batch_id": "$batch_id"}
+
+
+def rebuild_global_issues(suffix):
+    now = datetime.now(timezone.utc)
+    shadow_issues = f"global_issues_rebuild_{suffix}"
+    shadow_reporters = f"issue_reporters_rebuild_{suffix}"
+
+    analyzed = [
+        {"$match": {"ai": {"$exists": True}}},
+        {"$sort": {"created_at": 1}},
+        {"$set": {"issue_key": ISSUE_KEY_EXPR}},
+    ]
+
+    feedbacks.aggregate(analyzed + [
+        {"$group": {
+            "_id": "$issue_key",
+            "category": {"$first": {"$ifNull": ["$ai.category", "Other"]}},
+            "issue_text": {"$first": {"$ifNull": ["$ai.main_issue", "General Issue"]}},
+            "total_reports": {"$sum": 1},
+            "districts": {"$addToSet": "$location.district"},
+            "recent_users": {"$lastN": {"n": RECENT_REPORTERS, "input": REPORTER_EXPR}},
+            "last_batch_id": {"$last": "$batch_id"},
+            "created_at": {"$min": "$created_at"},
+        }},
+        {"$set": {"issue_key": "$_id", "last_updated": now}},
+        {"$unset": "_id"},
+        *PRIORITY_PIPELINE,
+        {"$out": shadow_issues},
+    ], allowDiskUse=True)
+
+    feedbacks.aggregate(analyzed + [
+        {"$setWindowFields": {
+            "partitionBy": "$issue_key",
+            "sortBy": {"created_at": 1},
+            "output": {"rank": {"$documentNumber": {}}}
+        }},
+        {"$group": {
+            "_id": {
+                "issue_key": "$issue_key",
+                "bucket": {"$floor": {"$divide": [{"$subtract": ["$rank", 1]}, REPORTER_BUCKET_SIZE]}}
+            },
+            "users": {"$push": REPORTER_EXPR},
+            "count": {"$sum": 1},
+            "created_at": {"$min": "$created_at"},
+        }},
+        {"$set": {"issue_key": "$_id.issue_key", "last_updated": now}},
+        {"$unset": "_id"},
+        {"$out": shadow_reporters},
+    ], allowDiskUse=True)
+
+    return {"global_issues": shadow_issues, "issue_reporters": shadow_reporters}
+
+
+def swap_in(shadows):
+    """Indexes the shadow collections, then renames them over the live ones."""
+    for live, shadow in shadows.items():
+        for name, keys, options in INDEXES[live]:
+            db[shadow].create_index(keys, name=name, **options)
+        db[shadow].rename(live, dropTarget=True)
+        logger.info("Swapped %s -> %s", shadow, live)
+    bump("feedbacks", *shadows)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run-id", default=f"{RULES_VERSION}-{get_backend().version}")
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-ops", type=int, default=0, help="write cap in ops/sec (0 = unlimited)")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--restart", action="store_true")
+    args = parser.parse_args(argv)
+
+    state = reanalyze(args.run_id, args.page_size, args.workers, args.max_ops, args.dry_run, args.restart)
+
+    if args.dry_run:
+        logger.info("Dry run: %d feedbacks, %d would change (%d category, %d priority)",
+                    state["processed"], state["changed"], state["changed_category"], state["changed_priority"])
+        return 0
+
+    if state.get("phase") != "done":
+        with rebuild_lease(f"backfill-{args.run_id}"):
+            swap_in({**rebuild_global_issues(args.run_id), **rebuild_rollups(args.run_id)})
+            mark_rollups_built()
+        state["phase"] = "done"
+        state["finished_at"] = datetime.now(timezone.utc)
+        checkpoints.replace_one({"_id": args.run_id}, state, upsert=True)
+
+    logger.info("Backfill %s finished: %d feedbacks, %d changed (%d category, %d priority)",
+                args.run_id, state["processed"], state["changed"], state["changed_category"], state["changed_priority"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Flushes batches that would otherwise wait forever in "collecting".
+
+A batch is sealed and sent for analysis when it is older than its
+district's max_age_hours, or older than min_fill_deadline_hours while
+still holding fewer than min_fill feedbacks.
+
+    python -m backend.batch_scheduler --interval 300
+    python -m backend.batch_scheduler --once
+
+Safe on several nodes: sealing is a conditional update on
+status="collecting", so only one node wins each batch.
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.db import batches, ensure_indexes
+from backend.batch_settings import get_batch_settings, shortest_deadline_hours
+from backend.feedback_service import dispatch_sealed_batch
+
+logger = logging.getLogger(__name__)
+
+
+def flush_reason(batch, now):
+    settings = get_batch_settings(batch["district"])
+    age = now - batch["created_at"]
+    if age >= timedelta(hours=settings["max_age_hours"]):
+        return "max_age"
+    if age >= timedelta(hours=settings["min_fill_deadline_hours"]) and batch["count"] < settings["min_fill"]:
+        return "min_fill"
+    return None
+
+
+def flush_stale_batches(now=None):
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=shortest_deadline_hours())
+
+    # Uses the (status, created_at) index; per-district rules are checked below
+    candidates = batches.find(
+        {"status": "collecting", "created_at": {"$lte": cutoff}},
+        {"batch_id": 1, "district": 1, "count": 1, "created_at": 1}
+    )
+
+    flushed = []
+    for batch in candidates:
+        if batch["created_at"].tzinfo is None:
+            batch["created_at"] = batch["created_at"].replace(tzinfo=timezone.utc)
+        reason = flush_reason(batch, now)
+        if not reason:
+            continue
+        sealed = batches.update_one(
+            {"_id": batch["_id"], "status": "collecting"},
+            {"$set": {"status": "processing", "sealed_at": now, "sealed_by": reason}}
+        )
+        if sealed.modified_count:
+            # Only the node that flipped the status dispatches it
+            dispatch_sealed_batch(batch["batch_id"])
+            flushed.append(batch["batch_id"])
+            logger.info("Flushed batch %s (%s, %d feedbacks)", batch["batch_id"], reason, batch["count"])
+    return flushed
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Seal and analyze batches that are too old to wait")
+    parser.add_argument("--interval", type=int, default=300, help="seconds between sweeps")
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args(argv)
+
+    ensure_indexes("batches")
+    while True:
+        flush_stale_batches()
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import json
+import os
+
+# Per-district batch limits and flush deadlines. Districts not listed use "default".
+BATCH_SETTINGS_PATH = os.getenv(
+    "BATCH_SETTINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "batch_settings.json")
+)
+
+DEFAULT_SETTINGS = {
+    "limit": 15,
+    "max_age_hours": 72,
+    "min_fill": 5,
+    "min_fill_deadline_hours": 24
+}
+
+_settings = None
+
+def load_batch_settings(path=BATCH_SETTINGS_PATH):
+    global _settings
+    try:
+        with open(path, encoding="utf-8") as f:
+            _settings = json.load(f)
+    except FileNotFoundError:
+        _settings = {}
+    return _settings
+
+def get_batch_settings(district):
+    if _settings is None:
+        load_batch_settings()
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(_settings.get("default", {}))
+    merged.update(_settings.get("districts", {}).get(district, {}))
+    return merged
+
+def shortest_deadline_hours():
+    """Smallest age at which any district's batch may be flushed."""
+    if _settings is None:
+        load_batch_settings()
+    candidates = [get_batch_settings(None)]
+    candidates += [get_batch_settings(d) for d in _settings.get("districts", {})]
+    return min(min(s["max_age_hours"], s["min_fill_deadline_hours"]) for s in candidates)
@@ -0,0 +1,92 @@
+"""
+Per-collection change counters for HTTP caching.
+
+Write paths bump the counter of the collections they touched, once per
+batch or backfill rather than per submission. Readers derive ETag /
+Last-Modified from (version, updated_at) plus, for INSERT_TRACKED
+collections, the newest _id, which moves on every insert without a write
+to one shared counter document. Both are cached in-process for
+CHANGE_COUNTER_TTL seconds, so conditional GETs inside that window are
+answered without touching Mongo.
+"""
+import os
+import time
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from backend.db import db
+
+change_counters = db["change_counters"]
+
+CHANGE_COUNTER_TTL = float(os.getenv("CHANGE_COUNTER_TTL", 2))
+
+# Inserted into on every submission: too hot to bump a counter per write
+INSERT_TRACKED = {"feedbacks"}
+
+_cache = {}  # name -> (version, updated_at, fetched_at)
+_newest = {}  # name -> (newest _id or None, fetched_at)
+
+
+def _bump_ops(names, now):
+    return [
+        UpdateOne({"_id": name}, {"$inc": {"version": 1}, "$set": {"updated_at": now}}, upsert=True)
+        for name in names
+    ]
+
+
+def _remember(name, doc):
+    version = doc["version"] if doc else 0
+    updated_at = doc["updated_at"] if doc else datetime(1970, 1, 1, tzinfo=timezone.utc)
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    _cache[name] = (version, updated_at, time.monotonic())
+    return version, updated_at
+
+
+def _cached(name):
+    hit = _cache.get(name)
+    if hit and time.monotonic() - hit[2] < CHANGE_COUNTER_TTL:
+        return hit[0], hit[1]
+    return None
+
+
+def bump(*names):
+    change_counters.bulk_write(_bump_ops(names, datetime.now(timezone.utc)), ordered=False)
+    for name in names:
+        _cache.pop(name, None)  # this node sees its own writes immediately
+
+
+def current(name):
+    """(version, updated_at) for a collection, at most CHANGE_COUNTER_TTL old."""
+    return _cached(name) or _remember(name, change_counters.find_one({"_id": name}))
+
+
+# --------------------------------------------------
+# Async twins for server.py
+# --------------------------------------------------
+async def bump_async(*names):
+    from backend.async_db import adb
+
+    await adb["change_counters"].bulk_write(_bump_ops(names, datetime.now(timezone.utc)), ordered=False)
+    for name in names:
+        _cache.pop(name, None)
+
+
+async def current_async(name):
+    from backend.async_db import adb
+
+    return _cached(name) or _remember(name, await adb["change_counters"].find_one({"_id": name}))
+
+
+async def newest_id_async(name):
+    """_id of the newest document (None if empty), at most CHANGE_COUNTER_TTL old."""
+    from backend.async_db import adb
+
+    hit = _newest.get(name)
+    if hit and time.monotonic() - hit[1] < CHANGE_COUNTER_TTL:
+        return hit[0]
+    doc = await adb[name].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    newest = doc["_id"] if doc else None
+    _newest[name] = (newest, time.monotonic())
+    return newest
@@ -0,0 +1,283 @@
+"""
+Classifier backends behind analyze_feedback_batch.
+
+    keyword : rule tables in backend/ai_engine.py (default)
+    ngram   : hashed word/char n-gram naive Bayes trained from labelled feedback
+
+Select with AI_BACKEND=keyword|ngram (and AI_MODEL_PATH for ngram), or per
+call with analyze_feedback_batch(texts, backend="ngram").
+Train:  python -m backend.classifiers train --labels labels.jsonl --out models/ngram_nb.npz
+
+--labels is a human-labelled file (JSONL or CSV with text, category and
+priority). Without it the trainer falls back to the ai.* fields stored on
+feedbacks, which the keyword engine wrote: a model trained on those can
+only learn to imitate the rules, mistakes included, and its holdout
+accuracy measures agreement with the rules rather than correctness.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+import zlib
+
+from backend.ai_engine import analyze_feedback_batch, extract_main_issue, translate_words
+
+AI_BACKEND = os.getenv("AI_BACKEND", "keyword")
+logger = logging.getLogger(__name__)
+
+AI_MODEL_PATH = os.getenv(
+    "AI_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "ngram_nb.npz")
+)
+
+
+# --------------------------------------------------
+# Keyword backend
+# --------------------------------------------------
+class KeywordBackend:
+    name = "keyword"
+    version = "keyword"
+
+    def analyze(self, texts):
+        return analyze_feedback_batch(texts, backend="keyword")
+
+
+# --------------------------------------------------
+# Hashed n-gram naive Bayes backend
+# --------------------------------------------------
+def _summary(words):
+    summary = " ".join(words[:15]).capitalize()
+    return summary + "..." if len(words) > 15 else summary
+
+
+class HashedNgramFeaturizer:
+    """Word 1-2 grams plus char 3-grams, hashed with crc32 into n_buckets."""
+
+    def __init__(self, n_buckets=2 ** 17, char_ngram=3):
+        self.n_buckets = n_buckets
+        self.char_ngram = char_ngram
+
+    def features(self, words):
+        buckets = self.n_buckets
+        n = self.char_ngram
+        out = []
+        prev = None
+        for word in words:
+            out.append(zlib.crc32(word.encode("utf-8")) % buckets)
+            if prev is not None:
+                out.append(zlib.crc32(f"{prev} {word}".encode("utf-8")) % buckets)
+            padded = f"<{word}>"
+            for i in range(len(padded) - n + 1):
+                out.append(zlib.crc32(f"#{padded[i:i + n]}".encode("utf-8")) % buckets)
+            prev = word
+        return out
+
+    def matrix(self, token_lists):
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        indptr, indices = [0], []
+        for words in token_lists:
+            indices.extend(self.features(words))
+            indptr.append(len(indices))
+        # Duplicate (row, col) pairs are summed by scipy, giving term counts
+        return csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(token_lists), self.n_buckets)
+        )
+
+
+class NaiveBayesHead:
+    def __init__(self, classes, log_prob, log_prior):
+        self.classes = list(classes)
+        self.log_prob = log_prob      # (n_buckets, n_classes) float32
+        self.log_prior = log_prior    # (n_classes,) float32
+
+    @classmethod
+    def fit(cls, X, labels, alpha=1.0):
+        import numpy as np
+
+        classes = sorted(set(labels))
+        index = {c: i for i, c in enumerate(classes)}
+        y = np.array([index[label] for label in labels])
+
+        counts = np.zeros((X.shape[1], len(classes)), dtype=np.float64)
+        for i in range(len(classes)):
+            counts[:, i] = np.asarray(X[y == i].sum(axis=0)).ravel()
+
+        log_prob = np.log(counts + alpha) - np.log(counts.sum(axis=0) + alpha * X.shape[1])
+        log_prior = np.log(np.bincount(y, minlength=len(classes)) / len(y))
+        return cls(classes, log_prob.astype(np.float32), log_prior.astype(np.float32))
+
+    def predict(self, X):
+        scores = X @ self.log_prob + self.log_prior
+        return [self.classes[i] for i in scores.argmax(axis=1)]
+
+
+class NgramBackend:
+    name = "ngram"
+
+    def __init__(self, featurizer, category_head, priority_head, version):
+        self.featurizer = featurizer
+        self.category_head = category_head
+        self.priority_head = priority_head
+        self.version = version
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:12]
+        data = np.load(path, allow_pickle=False)
+        featurizer = HashedNgramFeaturizer(int(data["n_buckets"]), int(data["char_ngram"]))
+        category_head = NaiveBayesHead(data["category_classes"], data["category_log_prob"], data["category_log_prior"])
+        priority_head = NaiveBayesHead(data["priority_classes"], data["priority_log_prob"], data["priority_log_prior"])
+        return cls(featurizer, category_head, priority_head, f"ngram-{digest}")
+
+    def save(self, path):
+        import numpy as np
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                n_buckets=self.featurizer.n_buckets,
+                char_ngram=self.featurizer.char_ngram,
+                category_classes=np.array(self.category_head.classes),
+                category_log_prob=self.category_head.log_prob,
+                category_log_prior=self.category_head.log_prior,
+                priority_classes=np.array(self.priority_head.classes),
+                priority_log_prob=self.priority_head.log_prob,
+                priority_log_prior=self.priority_head.log_prior,
+            )
+
+    def analyze(self, texts):
+        if not texts:
+            return []
+        token_lists = [translate_words(text) for text in texts]
+        X = self.featurizer.matrix(token_lists)
+        categories = self.category_head.predict(X)
+        priorities = self.priority_head.predict(X)
+        return [
+            {
+                "category": category,
+                "priority": priority,
+                "main_issue": extract_main_issue(category),
+                "summary": _summary(words)
+            }
+            for words, category, priority in zip(token_lists, categories, priorities)
+        ]
+
+
+def train_ngram(texts, categories, priorities, n_buckets=2 ** 17, alpha=1.0):
+    featurizer = HashedNgramFeaturizer(n_buckets)
+    X = featurizer.matrix([translate_words(text) for text in texts])
+    return NgramBackend(
+        featurizer,
+        NaiveBayesHead.fit(X, categories, alpha),
+        NaiveBayesHead.fit(X, priorities, alpha),
+        version="ngram-unsaved"
+    )
+
+
+# --------------------------------------------------
+# Backend selection
+# --------------------------------------------------
+_backends = {}
+
+def _load_backend(name):
+    if name not in _backends:
+        if name == "ngram":
+            _backends[name] = NgramBackend.load(AI_MODEL_PATH)
+        elif name == "keyword":
+            _backends[name] = KeywordBackend()
+        else:
+            raise ValueError(f"Unknown AI backend: {name}")
+    return _backends[name]
+
+def get_backend():
+    """The backend selected by AI_BACKEND."""
+    return _load_backend(AI_BACKEND)
+
+def resolve_backend(backend=None):
+    """None -> AI_BACKEND, a name -> that backend, a backend object -> itself."""
+    if backend is None:
+        return get_backend()
+    if isinstance(backend, str):
+        return _load_backend(backend)
+    return backend
+
+
+# --------------------------------------------------
+# Offline training CLI
+# --------------------------------------------------
+def _load_stored_labels(limit):
+    """Labels the keyword engine stored on feedbacks (see the module docstring)."""
+    from backend.db import feedbacks
+
+    cursor = feedbacks.find(
+        {"ai.category": {"$exists": True}, "ai.priority": {"$exists": True}},
+        {"feedback.original_text": 1, "ai.category": 1, "ai.priority": 1}
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+    return [
+        (doc["feedback"]["original_text"], doc["ai"]["category"], doc["ai"]["priority"])
+        for doc in cursor
+    ]
+
+
+def load_label_file(path, limit=0):
+    """[(text, category, priority)] from a human-labelled JSONL or CSV file."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    rows = [(row["text"], row["category"], row["priority"]) for row in rows]
+    return rows[:limit] if limit else rows
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Train the n-gram classifier backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="train from a labelled file (or stored feedbacks)")
+    train.add_argument("--labels", help="human-labelled JSONL/CSV with text, category, priority")
+    train.add_argument("--out", default=AI_MODEL_PATH)
+    train.add_argument("--buckets", type=int, default=2 ** 17)
+    train.add_argument("--alpha", type=float, default=1.0)
+    train.add_argument("--limit", type=int, default=0)
+    train.add_argument("--holdout", type=float, default=0.1, help="share of docs kept back for accuracy")
+    args = parser.parse_args(argv)
+
+    if args.labels:
+        rows = load_label_file(args.labels, args.limit)
+    else:
+        logger.warning("No --labels file: training on keyword-engine labels stored on feedbacks; "
+                       "the model will imitate the rules and holdout accuracy only measures agreement with them")
+        rows = _load_stored_labels(args.limit)
+    if not rows:
+        logger.error("No labelled feedbacks found")
+        return 1
+    texts, categories, priorities = (list(column) for column in zip(*rows))
+
+    split = len(texts) - int(len(texts) * args.holdout)
+    model = train_ngram(texts[:split], categories[:split], priorities[:split], args.buckets, args.alpha)
+    model.save(args.out)
+    logger.info("Trained on %d feedbacks, saved to %s", split, args.out)
+
+    if split < len(texts):
+        predicted = model.analyze(texts[split:])
+        cat_acc = sum(p["category"] == c for p, c in zip(predicted, categories[split:])) / len(predicted)
+        pri_acc = sum(p["priority"] == c for p, c in zip(predicted, priorities[split:])) / len(predicted)
+        logger.info("Holdout accuracy: category=%.3f priority=%.3f", cat_acc, pri_acc)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
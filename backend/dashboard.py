@@ -0,0 +1,228 @@
+"""
+Data access for the admin dashboard (admin.py).
+
+The user's district access and departments become one Mongo filter, and
+every widget is an aggregation or a projected find under it, so a rerun
+reads counts and a few rows instead of the whole feedbacks collection.
+Counts (top metrics, department charts, selectors) come from the
+feedback_rollups rows; only the grouped issue list, the detail table (one
+page at a time) and the Excel export read feedbacks.
+
+top_issues uses $firstN, so MongoDB 5.2 or newer is required.
+"""
+from backend.db import feedbacks, batches
+from backend.rollups import feedback_rollups
+
+ALL_CATEGORIES = "All Categories"
+TOP_ISSUES_LIMIT = 50
+DETAIL_PAGE_SIZE = 500
+SAMPLE_REPORTERS = 3
+EXPORT_BATCH = 1000
+
+PRIORITY_RANK = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
+
+ANALYZED = {"ai": {"$type": "object"}}
+
+DETAIL_PROJECTION = {
+    "_id": 0,
+    "user.name": 1,
+    "location.district": 1,
+    "ai.category": 1,
+    "ai.priority": 1,
+    "ai.main_issue": 1,
+    "ai.summary": 1,
+    "feedback.original_text": 1,
+    "created_at": 1,
+}
+
+DETAIL_COLUMNS = ("Name", "District", "Category", "Priority", "Issue", "Feedback", "Date")
+
+
+# --------------------------------------------------
+# Scope
+# --------------------------------------------------
+def user_departments(user):
+    """role_category used to be a string; always hand back a list."""
+    raw = user.get("role_category", [ALL_CATEGORIES])
+    return [raw] if isinstance(raw, str) else raw
+
+
+def scope_filter(user):
+    """Mongo filter for what this user may see (super admins see everything)."""
+    if user["role"] == "super_admin":
+        return {}
+    scope = {"location.district": {"$in": user.get("access", [])}}
+    departments = user_departments(user)
+    if ALL_CATEGORIES not in departments:
+        scope["ai.category"] = {"$in": departments}
+    return scope
+
+
+def rollup_scope(user):
+    """scope_filter for feedback_rollups rows."""
+    scope = scope_filter(user)
+    return {
+        field: scope[path]
+        for path, field in (("location.district", "district"), ("ai.category", "category"))
+        if path in scope
+    }
+
+
+def _and(*clauses):
+    clauses = [c for c in clauses if c]
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _match(scope, district=None, constituency=None, analyzed=False):
+    return _and(
+        scope,
+        analyzed and ANALYZED,
+        district and {"location.district": district},
+        constituency and {"location.constituency": constituency}
+    )
+
+
+# --------------------------------------------------
+# Widgets
+# --------------------------------------------------
+def totals(rscope):
+    """
+    Received / analyzed / pending. Analyzed is summed from the rollups;
+    pending is what still sits in open or failed batches, plus unanalyzed
+    feedback that never got a batch_id (stored before batches were
+    allocated up front). Unanalyzed feedback has no category yet, so
+    department-scoped users have none.
+    """
+    analyzed = next(feedback_rollups.aggregate([
+        {"$match": rscope},
+        {"$group": {"_id": None, "count": {"$sum": "$count"}}}
+    ]), {"count": 0})["count"]
+
+    pending = 0
+    if "category" not in rscope:
+        open_batches = {"status": {"$in": ["collecting", "processing", "failed"]}}
+        unbatched = {"batch_id": None, "ai": {"$exists": False}}
+        if "district" in rscope:
+            open_batches["district"] = rscope["district"]
+            unbatched["location.district"] = rscope["district"]
+        pending = next(batches.aggregate([
+            {"$match": open_batches},
+            {"$group": {"_id": None, "count": {"$sum": "$count"}}}
+        ]), {"count": 0})["count"]
+        pending += feedbacks.count_documents(unbatched)
+
+    return {"received": analyzed + pending, "analyzed": analyzed, "pending": pending}
+
+
+def analyzed_districts(rscope):
+    return sorted(d for d in feedback_rollups.distinct("district", rscope) if d)
+
+
+def constituencies(rscope, district):
+    return sorted(c for c in feedback_rollups.distinct("constituency", _and(rscope, {"district": district})) if c)
+
+
+def category_counts(rscope, district=None, constituency=None):
+    """[(department, count)] of analyzed feedback, largest first."""
+    pipeline = [
+        {"$match": _and(rscope, district and {"district": district}, constituency and {"constituency": constituency})},
+        {"$group": {"_id": "$category", "count": {"$sum": "$count"}}},
+        {"$sort": {"count": -1, "_id": 1}}
+    ]
+    return [(row["_id"], row["count"]) for row in feedback_rollups.aggregate(pipeline)]
+
+
+def top_issues(scope):
+    """Analyzed feedback grouped by (category, main_issue), most urgent first."""
+    priority_rank = {"$switch": {
+        # The engine says "High", older docs "HIGH"
+        "branches": [{"case": {"$eq": [{"$toUpper": "$ai.priority"}, p]}, "then": rank}
+                     for p, rank in PRIORITY_RANK.items()],
+        "default": 1
+    }}
+    pipeline = [
+        {"$match": _match(scope, analyzed=True)},
+        {"$group": {
+            "_id": {
+                "category": {"$ifNull": ["$ai.category", "General"]},
+                "issue_text": {"$ifNull": ["$ai.main_issue", "Unknown Issue"]}
+            },
+            "total_reports": {"$sum": 1},
+            "priority_rank": {"$max": priority_rank},
+            "districts": {"$addToSet": {"$ifNull": ["$location.district", "Unknown"]}},
+            "users": {"$firstN": {"input": {"$ifNull": ["$user.name", "Anonymous"]}, "n": SAMPLE_REPORTERS}}
+        }},
+        {"$sort": {"priority_rank": -1, "total_reports": -1}},
+        {"$limit": TOP_ISSUES_LIMIT}
+    ]
+    rank_to_priority = {rank: p for p, rank in PRIORITY_RANK.items()}
+    return [
+        {
+            "issue_text": row["_id"]["issue_text"],
+            "category": row["_id"]["category"],
+            "priority": rank_to_priority[row["priority_rank"]],
+            "total_reports": row["total_reports"],
+            "districts": sorted(row["districts"]),
+            "users": row["users"]
+        }
+        for row in feedbacks.aggregate(pipeline, allowDiskUse=True)
+    ]
+
+
+def feedback_count(scope, district=None):
+    return feedbacks.count_documents(_match(scope, district, analyzed=True))
+
+
+def feedback_rows(scope, district=None, page=0, page_size=DETAIL_PAGE_SIZE):
+    """One page of analyzed feedback for the detail table, newest first, display fields only."""
+    return list(
+        feedbacks.find(_match(scope, district, analyzed=True), DETAIL_PROJECTION)
+        .sort([("created_at", -1), ("_id", -1)])
+        .skip(page * page_size)
+        .limit(page_size)
+    )
+
+
+def detail_row(fb):
+    """A feedback as a DETAIL_COLUMNS row."""
+    user = fb.get("user", {})
+    location = fb.get("location", {})
+    ai = fb.get("ai", {})
+    return (
+        user.get("name", "N/A"),
+        location.get("district", "N/A"),
+        ai.get("category", "N/A"),
+        ai.get("priority", "N/A"),
+        ai.get("main_issue", "N/A"),
+        fb.get("feedback", {}).get("original_text", ""),
+        fb.get("created_at", "")
+    )
+
+
+def write_feedback_export(scope, out, district=None):
+    """
+    Every analyzed feedback in scope as an .xlsx written to `out`; returns
+    the row count. Rows are streamed from the cursor into a write-only
+    workbook, so memory does not grow with the scope.
+    """
+    from openpyxl import Workbook  # only the export needs it
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Feedbacks")
+    sheet.append(DETAIL_COLUMNS)
+    cursor = (
+        feedbacks.find(_match(scope, district, analyzed=True), DETAIL_PROJECTION)
+        .sort([("created_at", -1), ("_id", -1)])
+        .batch_size(EXPORT_BATCH)
+    )
+    rows = 0
+    for fb in cursor:
+        row = detail_row(fb)
+        created_at = row[-1]
+        # Excel has no time zones
+        sheet.append(row[:-1] + (created_at.replace(tzinfo=None) if created_at else "",))
+        rows += 1
+    workbook.save(out)
+    return rows
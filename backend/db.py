@@ -1,7 +1,13 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+import argparse
 import os
+import sys
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+from backend.metrics import EVENT_LISTENERS
+
 # Load .env file
 load_dotenv()
 
@@ -11,10 +17,11 @@ MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 print("DEBUG: MONGODB_URI =", MONGODB_URI)
 
 # Connect to MongoDB (SINGLE CLIENT)
-client = MongoClient(MONGODB_URI)
+client = MongoClient(MONGODB_URI, event_listeners=EVENT_LISTENERS)
 
 # Database
-db = client["feedback_ai_db"]
+DB_NAME = os.getenv("MONGODB_DB", "feedback_ai_db")
+db = client[DB_NAME]
 print("🔥 USING DATABASE:", db.name)
 
 # Collections
@@ -22,3 +29,223 @@ feedbacks = db["feedbacks"]               # user submitted feedback
 batches = db["batches"]                   # batch tracking
 analysis_results = db["analysis_results"] # AI analysis output
 global_issues = db["global_issues"]       # merged issues
+issue_reporters = db["issue_reporters"]   # bucketed reporter lists per issue
+
+
+# =========================
+# INDEXES (declared schema)
+# =========================
+# Bump SCHEMA_VERSION whenever INDEXES changes.
+SCHEMA_VERSION = 7
+
+INDEXES = {
+    "feedbacks": [
+        ("batch_id_1", [("batch_id", ASCENDING)], {}),
+        ("created_at_-1__id_-1", [("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ("location_time", [("location.district", ASCENDING), ("location.constituency", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("district_category_time", [("location.district", ASCENDING), ("ai.category", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("category_time", [("ai.category", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("dedupe_key_1", [("dedupe_key", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"dedupe_key": {"$exists": True}}}),
+    ],
+    "global_issues": [
+        ("issue_key_1", [("issue_key", ASCENDING)], {"unique": True}),
+        ("priority_reports", [("priority", ASCENDING), ("total_reports", DESCENDING)], {}),
+        ("created_at_-1__id_-1", [("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ("districts_time", [("districts", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "issue_reporters": [
+        ("issue_key_1_count_1", [("issue_key", ASCENDING), ("count", ASCENDING)], {}),
+        ("issue_key_1_created_at_-1", [("issue_key", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    "users": [
+        ("username_1", [("username", ASCENDING)], {"unique": True}),
+    ],
+    "batches": [
+        ("batch_id_1", [("batch_id", ASCENDING)], {"unique": True}),
+        ("one_collecting_batch", [("district", ASCENDING), ("constituency", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"status": "collecting"}}),
+        ("status_1_created_at_1", [("status", ASCENDING), ("created_at", ASCENDING)], {}),
+    ],
+    "rate_limits": [
+        ("expires_at_1", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "jobs": [
+        ("status_1_run_at_1", [("status", ASCENDING), ("run_at", ASCENDING)], {}),
+        ("status_1_lease_until_1", [("status", ASCENDING), ("lease_until", ASCENDING)], {}),
+    ],
+    "issue_events": [
+        ("seq_1", [("seq", ASCENDING)], {}),
+    ],
+    "feedback_rollups": [
+        ("rollup_key", [("district", ASCENDING), ("constituency", ASCENDING), ("category", ASCENDING),
+                        ("priority", ASCENDING), ("day", ASCENDING)], {"unique": True}),
+    ],
+}
+
+# Collections that must be created capped (size in bytes) before their indexes
+CAPPED = {
+    "issue_events": int(os.getenv("ISSUE_EVENTS_BYTES", 16 * 1024 * 1024)),
+}
+
+
+def seal_duplicate_collecting_batches():
+    """
+    Data written before the one_collecting_batch index existed can hold
+    several collecting batches for one constituency, and the unique index
+    cannot be built over them. Keeps the fullest one collecting, seals the
+    rest and sends them for analysis. Returns the sealed batch ids.
+    """
+    now = datetime.now(timezone.utc)
+    sealed = []
+    for group in batches.aggregate([
+        {"$match": {"status": "collecting"}},
+        {"$sort": {"count": -1, "created_at": 1}},
+        {"$group": {"_id": {"district": "$district", "constituency": "$constituency"},
+                    "batch_ids": {"$push": "$batch_id"}}},
+        {"$match": {"batch_ids.1": {"$exists": True}}}
+    ]):
+        for batch_id in group["batch_ids"][1:]:
+            result = batches.update_one(
+                {"batch_id": batch_id, "status": "collecting"},
+                {"$set": {"status": "processing", "sealed_at": now, "sealed_by": "duplicate"}}
+            )
+            if result.modified_count:
+                sealed.append(batch_id)
+
+    if sealed:
+        from backend.feedback_service import dispatch_sealed_batch
+
+        for batch_id in sealed:
+            dispatch_sealed_batch(batch_id)
+        print(f"⚠️ Sealed {len(sealed)} duplicate collecting batches")
+    return sealed
+
+
+def backfill_issue_created_at():
+    """
+    global_issues written before created_at existed sort after every other
+    issue and cannot be paged past. Gives them last_updated, or the
+    creation time of their _id. Returns the number of issues fixed.
+    """
+    result = global_issues.update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$ifNull": ["$last_updated", {"$toDate": "$_id"}]}}}]
+    )
+    if result.modified_count:
+        print(f"⚠️ Backfilled created_at on {result.modified_count} global issues")
+    return result.modified_count
+
+
+# Data fixes that must run before a collection's indexes are built (or used)
+PRE_INDEX_MIGRATIONS = {
+    "batches": seal_duplicate_collecting_batches,
+    "global_issues": backfill_issue_created_at,
+}
+
+
+def ensure_indexes(collection_name):
+    """Creates the declared indexes of one collection (no-op if they exist)."""
+    if collection_name in CAPPED:
+        try:
+            db.create_collection(collection_name, capped=True, size=CAPPED[collection_name])
+        except CollectionInvalid:
+            pass  # already there
+    migrate = PRE_INDEX_MIGRATIONS.get(collection_name)
+    if migrate:
+        migrate()
+    for name, keys, options in INDEXES[collection_name]:
+        try:
+            db[collection_name].create_index(keys, name=name, **options)
+        except DuplicateKeyError:
+            if not migrate:
+                raise
+            # A duplicate slipped in between the migration and the build
+            migrate()
+            db[collection_name].create_index(keys, name=name, **options)
+
+
+def init_indexes():
+    for collection_name in INDEXES:
+        ensure_indexes(collection_name)
+        print(f"✅ Indexes ready: {collection_name}")
+    db["schema_meta"].update_one(
+        {"_id": "indexes"},
+        {"$set": {"version": SCHEMA_VERSION, "applied_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    print(f"✅ Schema version {SCHEMA_VERSION} applied")
+
+
+def check_indexes():
+    """Returns {collection: {"missing": [...], "extra": [...]}} against INDEXES."""
+    report = {}
+    for collection_name, declared in INDEXES.items():
+        existing = set(db[collection_name].index_information()) - {"_id_"}
+        wanted = {name for name, _, _ in declared}
+        report[collection_name] = {
+            "missing": sorted(wanted - existing),
+            "extra": sorted(existing - wanted)
+        }
+    return report
+
+
+# Hot queries that must never fall back to a collection scan
+HOT_QUERIES = {
+    "feedbacks by batch": lambda: feedbacks.find({"batch_id": "x"}),
+    "feedbacks by district (dashboard)": lambda: feedbacks.find({"location.district": "x"}).sort("created_at", -1),
+    "feedbacks by category (dashboard)": lambda: feedbacks.find({"ai.category": "Water"}).sort("created_at", -1),
+    "global issue by key": lambda: global_issues.find({"issue_key": "x"}),
+    "issues by district (API)": lambda: global_issues.find({"districts": "x"}).sort([("created_at", -1), ("_id", -1)]),
+    "user by username": lambda: db["users"].find({"username": "x"}),
+    "collecting batch": lambda: batches.find({"district": "x", "constituency": "y", "status": "collecting"}),
+    "stale batches": lambda: batches.find({"status": "collecting", "created_at": {"$lte": datetime.now(timezone.utc)}}),
+    "runnable jobs": lambda: db["jobs"].find({"status": "queued", "run_at": {"$lte": datetime.now(timezone.utc)}}),
+}
+
+
+def _stages(plan):
+    yield plan.get("stage")
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            yield from _stages(child)
+
+
+def explain_hot_queries():
+    """Returns {query name: winning plan stages}; COLLSCAN means a missing index."""
+    plans = {}
+    for name, query in HOT_QUERIES.items():
+        winning = query().explain()["queryPlanner"]["winningPlan"]
+        plans[name] = list(_stages(winning.get("queryPlan", winning)))
+    return plans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema bootstrap: python -m backend.db init|check|explain")
+    parser.add_argument("command", choices=["init", "check", "explain"])
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        init_indexes()
+
+    if args.command in ("init", "check"):
+        ok = True
+        for collection_name, diff in check_indexes().items():
+            if diff["missing"] or diff["extra"]:
+                ok = False
+                print(f"⚠️ {collection_name}: missing={diff['missing']} extra={diff['extra']}")
+        if ok:
+            print("✅ All declared indexes present, no extras")
+        if args.command == "check":
+            return 0 if ok else 1
+
+    scans = 0
+    for name, stages in explain_hot_queries().items():
+        flag = "❌" if "COLLSCAN" in stages else "✅"
+        scans += "COLLSCAN" in stages
+        print(f"{flag} {name}: {' <- '.join(s for s in stages if s)}")
+    return 1 if scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,186 +1,549 @@
+from collections import Counter
 from datetime import datetime, timezone
+import hashlib
+import os
+import time
 from uuid import uuid4
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from backend.utils.security import hash_mobile, mask_mobile
-from backend.db import feedbacks, batches, analysis_results, global_issues
-from backend.ai_engine import analyze_feedback_batch
+from backend.db import feedbacks, batches, analysis_results, global_issues, issue_reporters, ensure_indexes
+from backend.ai_engine import normalize_words
+from backend.analysis_cache import analyze_feedback_batch_cached
+from backend.job_queue import enqueue_batch_analysis
+from backend.batch_settings import get_batch_settings
+from backend.change_counter import bump
+from backend.issue_stream import publish_batch_events
+from backend.rollups import apply_rollups
+from backend.metrics import (
+    STAGE_SECONDS, REQUEST_SECONDS, ANALYZED_DOCS, ANALYSIS_SECONDS,
+    timed, count_round_trips, observe_batch_fill
+)
 
 print("🔥 NEW feedback_service.py LOADED 🔥")
 
+# "queue": sealed batches go to the job queue (run `python -m backend.worker`)
+# "inline": analyze in the request, as before (handy for local dev)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "queue")
+
+# A batch can be sealed while earlier slot holders are still storing their
+# docs; analysis waits until every slot's doc is tagged, for up to this long
+BATCH_TAG_GRACE_SECONDS = float(os.getenv("BATCH_TAG_GRACE_SECONDS", 30))
+BATCH_NOT_READY_RETRY_SECONDS = float(os.getenv("BATCH_NOT_READY_RETRY_SECONDS", 1))
+
+# Same text from the same mobile within one window counts as a double submit
+DEDUPE_WINDOW_HOURS = int(os.getenv("DEDUPE_WINDOW_HOURS", 24))
+DUPLICATE = "duplicate"
+
 # --------------------------------------------------
 # Batch Handling (Hidden)
 # --------------------------------------------------
-def get_or_create_batch(district, constituency, limit=1):  # SET TO 15
-    batch = batches.find_one_and_update(
-        {
-            "district": district,
-            "constituency": constituency,
-            "status": "collecting"
-        },
-        {"$inc": {"count": 1}},
-        return_document=ReturnDocument.AFTER
-    )
+_indexes_ready = False
 
-    if not batch:
-        batch = {
-            "batch_id": str(uuid4()),
-            "district": district,
-            "constituency": constituency,
-            "count": 1,
-            "limit": limit,
-            "status": "collecting",
-            "created_at": datetime.now(timezone.utc)
-        }
-        batches.insert_one(batch)
+def ensure_service_indexes():
+    # Unique batch and dedupe indexes are what make the writes below safe
+    global _indexes_ready
+    if not _indexes_ready:
+        ensure_indexes("batches")
+        ensure_indexes("feedbacks")
+        ensure_indexes("issue_reporters")  # reporter_bucket_ops hints its index
+        _indexes_ready = True
 
-    return batch
+def allocation_pipeline(new_id, want, limit, now):
+    return [
+        {"$set": {
+            "batch_id": {"$ifNull": ["$batch_id", new_id]},
+            "limit": {"$ifNull": ["$limit", limit]},
+            "created_at": {"$ifNull": ["$created_at", now]}
+        }},
+        {"$set": {
+            "count": {"$min": [{"$add": [{"$ifNull": ["$count", 0]}, want]}, "$limit"]}
+        }},
+        {"$set": {
+            "status": {"$cond": [{"$gte": ["$count", "$limit"]}, "processing", "collecting"]},
+            "sealed_at": {"$cond": [{"$gte": ["$count", "$limit"]}, now, "$$REMOVE"]}
+        }}
+    ]
+
+
+def allocation_result(before, new_id, want, limit):
+    """Turns the pre-update batch into the caller's slot reservation (None = retry)."""
+    if before is None:  # we created it
+        before = {"batch_id": new_id, "limit": limit, "count": 0}
+    taken = min(want, before["limit"] - before["count"])
+    if taken <= 0:
+        # Legacy batch already at its limit; the update sealed it (the caller dispatches it)
+        return None
+
+    count = before["count"] + taken
+    return {
+        "batch_id": before["batch_id"],
+        "limit": before["limit"],
+        "slot": before["count"] + 1,
+        "taken": taken,
+        "count": count,
+        "sealed": count >= before["limit"]
+    }
+
+
+def allocate_batch_slots(district, constituency, want=1, limit=15):
+    """
+    Reserves up to `want` slots in the constituency's collecting batch,
+    creating the batch if needed, in a single upsert. The op that takes the
+    last slot also seals the batch (status -> "processing"), so a batch can
+    never be overfilled. Returns batch_id, limit, first slot (1-based),
+    taken, count and sealed; taken < want means the batch filled up.
+    """
+    ensure_service_indexes()
+
+    while True:
+        new_id = str(uuid4())
+        now = datetime.now(timezone.utc)
+        try:
+            before = batches.find_one_and_update(
+                {"district": district, "constituency": constituency, "status": "collecting"},
+                allocation_pipeline(new_id, want, limit, now),
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Lost the race to create the batch; the winner's batch now matches
+            continue
+
+        result = allocation_result(before, new_id, want, limit)
+        if result is None:
+            # Only this update could seal it, so only this caller dispatches it
+            print(f"⚠️ Sealed full legacy batch {before['batch_id']}")
+            dispatch_sealed_batch(before["batch_id"])
+            continue
+        if result["sealed"]:
+            observe_batch_fill((before or {}).get("created_at", now), now)
+        return result
+
+
+def get_or_create_batch(district, constituency, limit=15):
+    """One-slot allocation for a single submission."""
+    return allocate_batch_slots(district, constituency, 1, limit)
 
 
 # --------------------------------------------------
 # Main Entry Point
 # --------------------------------------------------
-def process_feedback(form_data):
-    print("🔥 process_feedback called with:", form_data)
+def dedupe_key_for(text, mobile_hash, district, constituency, when):
+    """
+    Fingerprint of normalized text + mobile + location + time bucket;
+    unique-indexed on feedbacks. None without a mobile number: anonymous
+    submissions cannot be told apart from different people saying the same.
+    """
+    if not mobile_hash:
+        return None
+    bucket = int(when.timestamp() // (DEDUPE_WINDOW_HOURS * 3600))
+    raw = f"{' '.join(normalize_words(text))}|{mobile_hash}|{district}|{constituency}|{bucket}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
+def build_feedback_doc(form_data, batch_id=None):
     # 🔐 MOBILE NUMBER SECURITY
     mobile_no = form_data.get("mobile_no")
-    mobile_hash = hash_mobile(mobile_no)
-    mobile_masked = mask_mobile(mobile_no)
-
-    # 1. Add to Batch  ✅ FIX: limit explicitly passed
-    batch = get_or_create_batch(
-        form_data["district"],
-        form_data["constituency"],
-        limit=1   # change to 15 for production
+    mobile_hash = hash_mobile(mobile_no) if mobile_no else None
+    now = datetime.now(timezone.utc)
+    doc = {
+        "location": {
+            "district": form_data["district"],
+            "constituency": form_data["constituency"]
+        },
+        "user": {
+            "name": form_data.get("name"),
+            "age": form_data.get("age"),
+            "mobile_hash": mobile_hash,
+            "mobile_masked": mask_mobile(mobile_no) if mobile_no else None,
+            "email": form_data.get("email")
+        },
+        "feedback": {
+            "type": form_data["type_of_feedback"],
+            "original_text": form_data["feedback_text"],
+            "rating": form_data.get("rating"),
+            "need_update": form_data.get("need_update", False)
+        },
+        "batch_id": batch_id,
+        "created_at": now
+    }
+    # Left out rather than null: the unique index only covers docs that have one
+    dedupe_key = dedupe_key_for(
+        form_data["feedback_text"], mobile_hash, form_data["district"], form_data["constituency"], now
     )
+    if dedupe_key:
+        doc["dedupe_key"] = dedupe_key
+    return doc
 
-    # 2. Save Feedback
-    result = feedbacks.insert_one({
-    "location": {
-        "district": form_data["district"],
-        "constituency": form_data["constituency"]
-    },
-    "user": {
-        "name": form_data.get("name"),
-        "age": form_data.get("age"),
-        "mobile_hash": mobile_hash,
-        "mobile_masked": mobile_masked,
-        "email": form_data.get("email")
-    },
-    "feedback": {
-        "type": form_data["type_of_feedback"],
-        "original_text": form_data["feedback_text"],
-        "rating": form_data.get("rating"),
-        "need_update": form_data.get("need_update", False)
-    },
-    "batch_id": batch["batch_id"],
-    "created_at": datetime.now(timezone.utc)
-})
+
+def process_feedback(form_data):
+    print("🔥 process_feedback called with:", form_data)
+
+    with timed(REQUEST_SECONDS, "sync"), count_round_trips():
+        return _process_feedback(form_data)
+
+
+def _process_feedback(form_data):
+    ensure_service_indexes()
+
+    with timed(STAGE_SECONDS, "hashing"):
+        doc = build_feedback_doc(form_data)
+
+    # 1. Take a batch slot first, so the doc is stored with its batch_id in one write
+    with timed(STAGE_SECONDS, "batch_allocation"):
+        batch = get_or_create_batch(
+            form_data["district"],
+            form_data["constituency"],
+            limit=get_batch_settings(form_data["district"])["limit"]
+        )
+    doc["batch_id"] = batch["batch_id"]
+
+    # 2. Save Feedback (the unique dedupe_key index rejects double submits)
+    try:
+        with timed(STAGE_SECONDS, "insert"):
+            result = feedbacks.insert_one(doc)
+    except DuplicateKeyError:
+        print("♻️ DUPLICATE FEEDBACK IGNORED")
+        # Only real submissions keep a slot; a batch we sealed still has to go out
+        release_batch_slots([batch["batch_id"]])
+        if batch["sealed"]:
+            dispatch_sealed_batch(batch["batch_id"])
+        return {"message": "Duplicate feedback - we already have this one.", "duplicate": True}
 
     print("✅ RAW FEEDBACK STORED IN:", feedbacks.full_name)
     print("✅ INSERTED ID:", result.inserted_id)
 
-    # 3. Check Limit (Run AI if full) ✅ SAFE FIX
-    if batch["count"] >= batch["limit"] and batch["status"] == "collecting":
-        batches.update_one(
-            {"batch_id": batch["batch_id"]},
-            {"$set": {"status": "processing"}}
-        )
-        analyze_and_store_batch(batch["batch_id"])
-        return {"message": "Batch Full - AI Analysis Started!"}
+    # 3. Run AI if this submission sealed the batch (allocator already flipped the status)
+    if batch["sealed"]:
+        return {"message": dispatch_sealed_batch(batch["batch_id"])}
 
     remaining = batch["limit"] - batch["count"]
     return {"message": f"Feedback stored. Waiting for {remaining} more users."}
 
 
+# --------------------------------------------------
+# Bulk Entry Point (offline paper forms)
+# --------------------------------------------------
+def process_feedback_bulk(form_list):
+    """
+    Stores a chunk of already-validated submissions. Records are grouped by
+    (district, constituency) so each group takes its slots in one allocation
+    per batch, then every doc goes out with its batch_id in one insert_many.
+    Duplicates are rejected by the dedupe_key index and hand their slot
+    back. Returns one (inserted_id, error) pair per record, in input order;
+    error is DUPLICATE for double submits.
+    """
+    ensure_service_indexes()
+    if not form_list:
+        return []
+
+    docs = [build_feedback_doc(form_data) for form_data in form_list]
+    sealed = []
+    for (district, constituency), idxs in group_by_location(form_list).items():
+        limit = get_batch_settings(district)["limit"]
+        pos = 0
+        while pos < len(idxs):
+            alloc = allocate_batch_slots(district, constituency, len(idxs) - pos, limit)
+            for idx in idxs[pos:pos + alloc["taken"]]:
+                docs[idx]["batch_id"] = alloc["batch_id"]
+            pos += alloc["taken"]
+            if alloc["sealed"]:
+                sealed.append(alloc["batch_id"])
+
+    failed = {}
+    try:
+        feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = bulk_failures(e)
+    release_batch_slots(docs[idx]["batch_id"] for idx in failed)
+
+    # Dispatch only after the docs are stored, so the analysis sees every one
+    for batch_id in sealed:
+        dispatch_sealed_batch(batch_id)
+    return bulk_results(docs, failed)
+
+
+def bulk_failures(error):
+    """{index: DUPLICATE or error message} from an unordered insert_many."""
+    return {
+        err["index"]: DUPLICATE if err.get("code") == 11000 else err.get("errmsg", "write failed")
+        for err in error.details.get("writeErrors", [])
+    }
+
+
+def group_by_location(form_list):
+    groups = {}
+    for idx, form_data in enumerate(form_list):
+        groups.setdefault((form_data["district"], form_data["constituency"]), []).append(idx)
+    return groups
+
+
+def release_ops(batch_ids):
+    """Gives back one slot per entry, for docs that took a slot but were not stored."""
+    released = Counter(batch_ids)
+    return [UpdateOne({"batch_id": batch_id}, {"$inc": {"count": -n}}) for batch_id, n in released.items()]
+
+
+def release_batch_slots(batch_ids):
+    ops = release_ops(batch_ids)
+    if ops:
+        batches.bulk_write(ops, ordered=False)
+
+
+def bulk_results(docs, failed):
+    return [(None, failed[i]) if i in failed else (doc["_id"], None) for i, doc in enumerate(docs)]
+
+
 # --------------------------------------------------
 # AI Processing
 # --------------------------------------------------
+class BatchNotReady(Exception):
+    """Fewer docs carry the batch_id than slots were handed out; retry shortly."""
+
+
+def dispatch_sealed_batch(batch_id):
+    """Hands a sealed batch to the queue (or analyzes inline in dev mode)."""
+    if ANALYSIS_MODE == "inline":
+        analyze_when_ready(batch_id)
+        return "Batch Full - AI Analysis Started!"
+    enqueue_batch_analysis(batch_id)
+    return "Batch Full - AI Analysis Queued!"
+
+
+def analyze_when_ready(batch_id):
+    """Inline mode: analyze_and_store_batch, waiting out slot holders still writing."""
+    while True:
+        try:
+            return analyze_and_store_batch(batch_id)
+        except BatchNotReady:
+            time.sleep(BATCH_NOT_READY_RETRY_SECONDS)
+
+
+def load_batch_docs(batch_id, now=None):
+    """
+    The batch's docs once all `count` of them are tagged. Raises
+    BatchNotReady while some are missing, until BATCH_TAG_GRACE_SECONDS
+    after sealing; after that the batch goes ahead with what it has.
+    """
+    batch = batches.find_one({"batch_id": batch_id}, {"count": 1, "sealed_at": 1})
+    docs = list(feedbacks.find({"batch_id": batch_id}))
+    if batch is None or len(docs) >= batch.get("count", 0):
+        return docs
+
+    now = now or datetime.now(timezone.utc)
+    sealed_at = batch.get("sealed_at") or now
+    if sealed_at.tzinfo is None:
+        sealed_at = sealed_at.replace(tzinfo=timezone.utc)
+    if (now - sealed_at).total_seconds() < BATCH_TAG_GRACE_SECONDS:
+        raise BatchNotReady(f"batch {batch_id}: {len(docs)} of {batch['count']} docs tagged")
+    print(f"⚠️ Batch {batch_id}: analyzing {len(docs)} of {batch['count']} docs after the grace period")
+    return docs
+
+
+def claim_batch_merge(batch_id):
+    """
+    True for exactly one run of a batch: the one that adds it to the
+    rollups and global issues. A run that dies after claiming leaves the
+    batch unmerged rather than merged twice.
+    """
+    return batches.update_one(
+        {"batch_id": batch_id, "merged_at": {"$exists": False}},
+        {"$set": {"merged_at": datetime.now(timezone.utc)}}
+    ).modified_count == 1
+
+
 def analyze_and_store_batch(batch_id):
+    """
+    Safe to run more than once for a batch (job retries, a second worker
+    after a lease expired): completed batches are skipped and the counting
+    side is claimed once per batch.
+    """
+    batch = batches.find_one({"batch_id": batch_id}, {"status": 1})
+    if batch is not None and batch.get("status") == "completed":
+        print(f"⏭️ Batch {batch_id} already completed.")
+        return True
+
     print(f"🚀 Analyzing Batch: {batch_id}")
+    ensure_service_indexes()
 
-    docs = list(feedbacks.find({"batch_id": batch_id}))
+    docs = load_batch_docs(batch_id)
     texts = [d["feedback"]["original_text"] for d in docs]
 
     try:
-        results = analyze_feedback_batch(texts)
+        with timed(STAGE_SECONDS, "analysis") as t:
+            results = analyze_feedback_batch_cached(texts)
     except Exception as e:
         print(f"❌ AI Failed: {e}")
-        return
+        return False
+    ANALYZED_DOCS.inc(len(texts))
+    ANALYSIS_SECONDS.inc(time.perf_counter() - t.start)
 
-    # Update Feedback Docs
+    # Update Feedback Docs (one round trip for the whole batch)
+    ops = []
     for doc, res in zip(docs, results):
-        feedbacks.update_one(
-            {"_id": doc["_id"]},
-            {"$set": {"ai": res}}
-        )
+        doc["ai"] = res
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"ai": res}}))
+    if ops:
+        feedbacks.bulk_write(ops, ordered=False)
 
-    # Update Global Issues (Smart Merging)
-    update_global_issues(docs, batch_id)
+    # $inc counters: only the run that claims the merge may apply them
+    if claim_batch_merge(batch_id):
+        apply_rollups(docs)
+
+        # Update Global Issues (Smart Merging)
+        with timed(STAGE_SECONDS, "global_merge"):
+            update_global_issues(docs, batch_id)
+
+        # Live dashboards (GET /api/stream/issues)
+        publish_batch_events(docs)
+    else:
+        print(f"⚠️ Batch {batch_id} was already merged; stored AI results only")
 
     # Mark Batch Complete
     batches.update_one(
         {"batch_id": batch_id},
-        {"$set": {"status": "completed"}}
+        {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc)}}
     )
+    bump("feedbacks", "global_issues", "feedback_rollups")
     print(f"✅ Batch {batch_id} Completed.")
+    return True
 
 
 # --------------------------------------------------
 # Global Issue Merging (Smart Logic)
 # --------------------------------------------------
+PRIORITY_THRESHOLDS = [(20, "CRITICAL"), (10, "HIGH"), (5, "MEDIUM")]
+
 def calculate_priority(count):
-    if count >= 20:
-        return "CRITICAL"
-    elif count >= 10:
-        return "HIGH"
-    elif count >= 5:
-        return "MEDIUM"
+    for threshold, priority in PRIORITY_THRESHOLDS:
+        if count >= threshold:
+            return priority
     return "LOW"
 
+# Same rule as calculate_priority, evaluated by Mongo inside an update pipeline
+PRIORITY_PIPELINE = [{
+    "$set": {
+        "priority": {
+            "$switch": {
+                "branches": [
+                    {"case": {"$gte": ["$total_reports", threshold]}, "then": priority}
+                    for threshold, priority in PRIORITY_THRESHOLDS
+                ],
+                "default": "LOW"
+            }
+        }
+    }
+}]
+
+
+def issue_key_for(ai):
+    category = ai.get("category", "Other")
+    main_issue = ai.get("main_issue", "General Issue")
+    return f"{category}_{main_issue}".replace(" ", "_").lower()
 
-def update_global_issues(docs, batch_id):
-    for fb in docs:
-        if "ai" not in fb:
-            continue
 
-        category = fb["ai"].get("category", "Other")
-        main_issue = fb["ai"].get("main_issue", "General Issue")
+# Reporters live in fixed-size buckets (issue_reporters) instead of one
+# ever-growing array; the issue doc keeps counters plus a short recent list.
+REPORTER_BUCKET_SIZE = 500
+RECENT_REPORTERS = 20
 
-        issue_key = f"{category}_{main_issue}".replace(" ", "_").lower()
 
-        user_info = {
+def group_by_issue(docs, batch_id):
+    groups = {}
+    for fb in docs:
+        if "ai" not in fb:
+            continue
+        issue_key = issue_key_for(fb["ai"])
+        group = groups.setdefault(issue_key, {
+            "category": fb["ai"].get("category", "Other"),
+            "issue_text": fb["ai"].get("main_issue", "General Issue"),
+            "districts": [],
+            "users": []
+        })
+        if fb["location"]["district"] not in group["districts"]:
+            group["districts"].append(fb["location"]["district"])
+        group["users"].append({
             "name": fb["user"]["name"],
             "mobile": fb["user"]["mobile_masked"],
             "batch_id": batch_id
-        }
+        })
+    return groups
+
+
+def global_issue_ops(groups, batch_id):
+    """
+    Two ops per issue_key: an upsert that adds the group's count, recent
+    reporters and districts, then a pipeline update that recomputes priority from the new
+    total. No reads needed.
+    """
+    now = datetime.now(timezone.utc)
+    ops = []
+    for issue_key, group in groups.items():
+        ops.append(UpdateOne(
+            {"issue_key": issue_key},
+            {
+                "$setOnInsert": {"category": group["category"], "issue_text": group["issue_text"], "created_at": now},
+                "$inc": {"total_reports": len(group["users"])},
+                "$push": {"recent_users": {"$each": group["users"], "$slice": -RECENT_REPORTERS}},
+                "$addToSet": {"districts": {"$each": group["districts"]}},
+                "$set": {"last_batch_id": batch_id, "last_updated": now}
+            },
+            upsert=True
+        ))
+        ops.append(UpdateOne({"issue_key": issue_key}, PRIORITY_PIPELINE))
+    return ops
 
-        existing = global_issues.find_one({"issue_key": issue_key})
 
-        if existing:
-            new_total = existing["total_reports"] + 1
-            global_issues.update_one(
-                {"issue_key": issue_key},
+# Walk an issue's buckets newest first, so the update picks the same one every time
+REPORTER_BUCKET_HINT = "issue_key_1_created_at_-1"
+
+
+def reporter_bucket_ops(groups):
+    """
+    Appends reporters to the newest bucket of each issue with room for the
+    whole chunk, so a bucket never grows past REPORTER_BUCKET_SIZE; when no
+    bucket has room the filter misses and the upsert opens a new one.
+    """
+    now = datetime.now(timezone.utc)
+    ops = []
+    for issue_key, group in groups.items():
+        users = group["users"]
+        for start in range(0, len(users), REPORTER_BUCKET_SIZE):
+            chunk = users[start:start + REPORTER_BUCKET_SIZE]
+            ops.append(UpdateOne(
+                {"issue_key": issue_key, "count": {"$lte": REPORTER_BUCKET_SIZE - len(chunk)}},
                 {
-                    "$inc": {"total_reports": 1},
-                    "$push": {"users": user_info},
-                    "$addToSet": {"batches": batch_id},
-                    "$set": {
-                        "priority": calculate_priority(new_total),
-                        "last_updated": datetime.now(timezone.utc)
-                    }
-                }
-            )
-        else:
-            global_issues.insert_one({
-                "issue_key": issue_key,
-                "category": category,
-                "issue_text": main_issue,
-                "total_reports": 1,
-                "priority": "LOW",
-                "batches": [batch_id],
-                "users": [user_info],
-                "last_updated": datetime.now(timezone.utc)
-            })
+                    "$push": {"users": {"$each": chunk}},
+                    "$inc": {"count": len(chunk)},
+                    "$setOnInsert": {"created_at": now},
+                    "$set": {"last_updated": now}
+                },
+                upsert=True,
+                hint=REPORTER_BUCKET_HINT
+            ))
+    return ops
+
+
+def update_global_issues(docs, batch_id, collection=global_issues, reporters=issue_reporters):
+    groups = group_by_issue(docs, batch_id)
+    if not groups:
+        return
+    # ordered: each priority recompute must run after its upsert
+    collection.bulk_write(global_issue_ops(groups, batch_id), ordered=True)
+    reporters.bulk_write(reporter_bucket_ops(groups), ordered=True)
+
+
+def get_issue_reporters(issue_key, limit=100, skip=0):
+    """Reporters for one issue, newest bucket first."""
+    users = []
+    for bucket in issue_reporters.find({"issue_key": issue_key}).sort("created_at", -1):
+        for user in reversed(bucket["users"]):
+            if skip:
+                skip -= 1
+                continue
+            users.append(user)
+            if len(users) >= limit:
+                return users
+    return users
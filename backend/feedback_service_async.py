@@ -0,0 +1,144 @@
+"""
+Async twin of backend/feedback_service.py for server.py.
+
+Uses PyMongo's AsyncMongoClient so FastAPI requests never block a threadpool
+thread on Mongo. Document shapes, allocation pipeline and dedupe rules are
+shared with the sync module; Streamlit keeps using the sync functions.
+"""
+import asyncio
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from backend.async_db import feedbacks, batches, jobs
+from backend.batch_settings import get_batch_settings
+from backend.job_queue import new_job
+from backend.metrics import STAGE_SECONDS, REQUEST_SECONDS, timed, count_round_trips, observe_batch_fill
+from backend import feedback_service
+from backend.feedback_service import (
+    allocation_pipeline, allocation_result, analyze_when_ready, build_feedback_doc,
+    bulk_failures, bulk_results, ensure_service_indexes, group_by_location, release_ops
+)
+
+
+# --------------------------------------------------
+# Batch Handling
+# --------------------------------------------------
+async def allocate_batch_slots_async(district, constituency, want=1, limit=15):
+    """Async allocate_batch_slots: one upsert, seals on the last slot."""
+    while True:
+        new_id = str(uuid4())
+        now = datetime.now(timezone.utc)
+        try:
+            before = await batches.find_one_and_update(
+                {"district": district, "constituency": constituency, "status": "collecting"},
+                allocation_pipeline(new_id, want, limit, now),
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            continue
+
+        result = allocation_result(before, new_id, want, limit)
+        if result is None:
+            # A full legacy batch that this update sealed; nobody else will dispatch it
+            await dispatch_sealed_batch_async(before["batch_id"])
+            continue
+        if result["sealed"]:
+            observe_batch_fill((before or {}).get("created_at", now), now)
+        return result
+
+
+async def get_or_create_batch_async(district, constituency, limit=15):
+    return await allocate_batch_slots_async(district, constituency, 1, limit)
+
+
+async def release_batch_slots_async(batch_ids):
+    ops = release_ops(batch_ids)
+    if ops:
+        await batches.bulk_write(ops, ordered=False)
+
+
+async def dispatch_sealed_batch_async(batch_id):
+    if feedback_service.ANALYSIS_MODE == "inline":
+        # Analysis is CPU-bound; keep it off the event loop
+        await asyncio.to_thread(analyze_when_ready, batch_id)
+        return "Batch Full - AI Analysis Started!"
+    try:
+        await jobs.insert_one(new_job("analyze_batch", batch_id, {"batch_id": batch_id}))
+    except DuplicateKeyError:
+        pass
+    return "Batch Full - AI Analysis Queued!"
+
+
+# --------------------------------------------------
+# Entry Points
+# --------------------------------------------------
+async def process_feedback_async(form_data):
+    with timed(REQUEST_SECONDS, "async"), count_round_trips():
+        return await _process_feedback_async(form_data)
+
+
+async def _process_feedback_async(form_data):
+    if not feedback_service._indexes_ready:
+        await asyncio.to_thread(ensure_service_indexes)
+
+    with timed(STAGE_SECONDS, "hashing"):
+        doc = build_feedback_doc(form_data)
+
+    with timed(STAGE_SECONDS, "batch_allocation"):
+        batch = await get_or_create_batch_async(
+            form_data["district"],
+            form_data["constituency"],
+            limit=get_batch_settings(form_data["district"])["limit"]
+        )
+    doc["batch_id"] = batch["batch_id"]
+
+    try:
+        with timed(STAGE_SECONDS, "insert"):
+            await feedbacks.insert_one(doc)
+    except DuplicateKeyError:
+        await release_batch_slots_async([batch["batch_id"]])
+        if batch["sealed"]:
+            await dispatch_sealed_batch_async(batch["batch_id"])
+        return {"message": "Duplicate feedback - we already have this one.", "duplicate": True}
+
+    if batch["sealed"]:
+        return {"message": await dispatch_sealed_batch_async(batch["batch_id"])}
+
+    remaining = batch["limit"] - batch["count"]
+    return {"message": f"Feedback stored. Waiting for {remaining} more users."}
+
+
+async def process_feedback_bulk_async(form_list):
+    """Async process_feedback_bulk; same (inserted_id, error) results."""
+    if not feedback_service._indexes_ready:
+        await asyncio.to_thread(ensure_service_indexes)
+    if not form_list:
+        return []
+
+    docs = [build_feedback_doc(form_data) for form_data in form_list]
+    sealed = []
+    for (district, constituency), idxs in group_by_location(form_list).items():
+        limit = get_batch_settings(district)["limit"]
+        pos = 0
+        while pos < len(idxs):
+            alloc = await allocate_batch_slots_async(district, constituency, len(idxs) - pos, limit)
+            for idx in idxs[pos:pos + alloc["taken"]]:
+                docs[idx]["batch_id"] = alloc["batch_id"]
+            pos += alloc["taken"]
+            if alloc["sealed"]:
+                sealed.append(alloc["batch_id"])
+
+    failed = {}
+    try:
+        await feedbacks.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = bulk_failures(e)
+    await release_batch_slots_async(docs[idx]["batch_id"] for idx in failed)
+
+    for batch_id in sealed:
+        await dispatch_sealed_batch_async(batch_id)
+    return bulk_results(docs, failed)
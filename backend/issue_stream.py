@@ -0,0 +1,297 @@
+"""
+Live issue events for GET /api/stream/issues (server-sent events).
+
+The analysis path (worker or inline) appends events to the capped
+`issue_events` collection. Each server process runs ONE tailable cursor on
+it (the Broadcaster) and fans events out to its open streams in memory, so
+a dashboard connection costs a queue, not a database poll. Event ids are a
+global sequence; Last-Event-ID replays from the in-memory buffer, or from
+the collection when the client has been away longer.
+
+Publishers reserve ids before they insert, so two batches finishing
+together can land out of order (11..20 before 1..10). The Broadcaster holds
+events that arrive ahead of a missing id and hands them out strictly in
+id order; an id that never shows up (its insert failed) is given up on
+after STREAM_GAP_TIMEOUT seconds.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from backend.db import db, global_issues, ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+issue_events = db["issue_events"]
+sequences = db["sequences"]
+
+STREAM_BUFFER = int(os.getenv("STREAM_BUFFER", 2000))          # recent events kept per process
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 500))   # per connection, then it is dropped
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", 15))
+STREAM_GAP_TIMEOUT = float(os.getenv("STREAM_GAP_TIMEOUT", 5))  # wait this long for a missing id
+STREAM_REPLAY_LIMIT = 1000
+TAIL_RETRY = 1.0
+
+_events_ready = False
+
+
+# --------------------------------------------------
+# Publishing (analysis path, sync)
+# --------------------------------------------------
+def reserve_seq(n):
+    """Reserves n consecutive event ids in one round trip; returns the first."""
+    doc = sequences.find_one_and_update(
+        {"_id": "issue_events"},
+        {"$inc": {"seq": n}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["seq"] - n + 1
+
+
+def batch_events(docs, issues, added):
+    """
+    One "feedback" event per analyzed doc and one "issue" event per touched
+    global issue. An issue event's district is the list of every district
+    the issue has been reported from, so a district stream sees the issues
+    its district shares with others.
+    """
+    from backend.feedback_service import calculate_priority
+
+    now = datetime.now(timezone.utc)
+    events = []
+    location = {}
+    for doc in docs:
+        if "ai" not in doc:
+            continue
+        location = doc["location"]
+        events.append({
+            "type": "feedback",
+            "district": location["district"],
+            "category": doc["ai"].get("category", "Other"),
+            "data": {
+                "feedback_id": str(doc["_id"]),
+                "constituency": location["constituency"],
+                "priority": doc["ai"].get("priority"),
+                "main_issue": doc["ai"].get("main_issue"),
+                "created_at": doc["created_at"]
+            },
+            "created_at": now
+        })
+    for issue in issues:
+        events.append({
+            "type": "issue",
+            "district": issue.get("districts") or [location.get("district")],
+            "category": issue.get("category", "Other"),
+            "data": {
+                "issue_key": issue["issue_key"],
+                "issue_text": issue.get("issue_text"),
+                "total_reports": issue["total_reports"],
+                "priority": issue["priority"],
+                "previous_priority": calculate_priority(issue["total_reports"] - added[issue["issue_key"]]),
+                "constituency": location.get("constituency")
+            },
+            "created_at": now
+        })
+    return events
+
+
+def publish_batch_events(docs):
+    """Called after a batch is analyzed and merged; never fails the batch."""
+    global _events_ready
+    from backend.feedback_service import issue_key_for
+
+    try:
+        if not _events_ready:
+            ensure_indexes("issue_events")
+            _events_ready = True
+
+        added = Counter(issue_key_for(doc["ai"]) for doc in docs if "ai" in doc)
+        issues = list(global_issues.find(
+            {"issue_key": {"$in": list(added)}},
+            {"issue_key": 1, "category": 1, "issue_text": 1, "total_reports": 1, "priority": 1, "districts": 1}
+        ))
+        events = batch_events(docs, issues, added)
+        if not events:
+            return
+        first = reserve_seq(len(events))
+        for offset, event in enumerate(events):
+            event["seq"] = first + offset
+        issue_events.insert_many(events, ordered=True)
+    except PyMongoError as e:
+        logger.warning("Issue events not published: %s", e)
+
+
+# --------------------------------------------------
+# Fan-out (server, async)
+# --------------------------------------------------
+class Subscription:
+    def __init__(self, district=None, category=None):
+        self.district = district
+        self.category = category
+        self.queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    def matches(self, event):
+        district = event.get("district")
+        if isinstance(district, list):  # issue events
+            in_district = self.district is None or self.district in district
+        else:
+            in_district = self.district is None or district == self.district
+        return in_district and (self.category is None or event.get("category") == self.category)
+
+
+class Broadcaster:
+    """One tailable cursor per process, fanned out to every open stream."""
+
+    def __init__(self):
+        self.recent = deque(maxlen=STREAM_BUFFER)
+        self.subscribers = set()
+        self.last_seq = None  # highest id handed out; only ever grows
+        self.pending = {}     # seq -> event that arrived ahead of a lower id
+        self.gap_since = None
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._tail())
+
+    def subscribe(self, district=None, category=None):
+        sub = Subscription(district, category)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+
+    def receive(self, event, now=None):
+        """Takes an event off the tail; publishes it once every lower id has been."""
+        seq = event["seq"]
+        if seq <= self.last_seq:
+            logger.warning("Issue event %d arrived after its gap was skipped; replay only", seq)
+            return
+        self.pending[seq] = event
+        self._drain(time.monotonic() if now is None else now)
+
+    def expire_gaps(self, now=None):
+        """Stops waiting for ids that have been missing longer than STREAM_GAP_TIMEOUT."""
+        now = time.monotonic() if now is None else now
+        if self.gap_since is None or now - self.gap_since < STREAM_GAP_TIMEOUT:
+            return
+        first = min(self.pending)
+        logger.warning("Issue events %d-%d never arrived; skipping", self.last_seq + 1, first - 1)
+        self.last_seq = first - 1
+        self._drain(now)
+
+    def _drain(self, now):
+        before = self.last_seq
+        while self.last_seq + 1 in self.pending:
+            self.publish(self.pending.pop(self.last_seq + 1))
+        if not self.pending:
+            self.gap_since = None
+        elif self.gap_since is None or self.last_seq != before:
+            self.gap_since = now  # a new gap starts its own clock
+
+    def publish(self, event):
+        self.last_seq = event["seq"]
+        self.recent.append(event)
+        for sub in list(self.subscribers):
+            if not sub.matches(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up: end its stream, it resumes via Last-Event-ID
+                self.unsubscribe(sub)
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)
+
+    async def replay(self, after, sub):
+        """
+        Events after `after` for a resuming client, oldest first, up to the
+        last one this process has published; later ones reach the client
+        through its queue in order, so none are skipped or sent twice.
+        """
+        upto = self.last_seq
+        if upto is not None and after >= upto:
+            return []
+        if self.recent and self.recent[0]["seq"] <= after + 1:
+            return [e for e in self.recent if e["seq"] > after and sub.matches(e)]
+
+        from backend.async_db import adb
+
+        query = {"seq": {"$gt": after} if upto is None else {"$gt": after, "$lte": upto}}
+        if sub.district:
+            query["district"] = sub.district
+        if sub.category:
+            query["category"] = sub.category
+        cursor = adb["issue_events"].find(query).sort("seq", 1).limit(STREAM_REPLAY_LIMIT)
+        return await cursor.to_list()
+
+    async def _tail(self):
+        from backend.async_db import adb
+
+        events = adb["issue_events"]
+        while True:
+            try:
+                if self.last_seq is None:
+                    await asyncio.to_thread(ensure_indexes, "issue_events")
+                    latest = await events.find_one({}, sort=[("seq", -1)])
+                    self.last_seq = latest["seq"] if latest else 0
+                cursor = events.find({"seq": {"$gt": self.last_seq}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    # Each pass ends when an await times out with nothing new
+                    async for event in cursor:
+                        self.receive(event)
+                    self.expire_gaps()
+            except PyMongoError as e:
+                logger.warning("Issue event tail restarting: %s", e)
+            self.expire_gaps()
+            # A tailable cursor on an empty collection closes at once; retry shortly
+            await asyncio.sleep(TAIL_RETRY)
+
+
+BROADCASTER = Broadcaster()
+
+
+def format_event(event):
+    data = json.dumps(
+        {"district": event.get("district"), "category": event.get("category"), **event["data"]},
+        default=str
+    )
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def stream_issue_events(district=None, category=None, last_event_id=None):
+    """SSE body for one connection; ends when the client disconnects or falls behind."""
+    BROADCASTER.start()
+    sub = BROADCASTER.subscribe(district, category)
+    try:
+        yield f"retry: {int(TAIL_RETRY * 3000)}\n\n"
+        last = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        if last is not None:
+            for event in await BROADCASTER.replay(last, sub):
+                yield format_event(event)
+                last = event["seq"]
+
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            if last is not None and event["seq"] <= last:
+                continue  # already sent during replay (the queue is in seq order)
+            yield format_event(event)
+            last = event["seq"]
+    finally:
+        BROADCASTER.unsubscribe(sub)
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+import os
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from backend.db import db, batches, ensure_indexes as db_ensure_indexes
+
+jobs = db["jobs"]  # background work queue
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+
+# Job states: queued -> running -> done
+#                          \-> queued (retry with backoff) -> ... -> dead
+# A dead analyze_batch job marks its batch "failed"; requeue_dead puts it
+# back to "processing".
+BATCH_JOB_KINDS = {"analyze_batch"}
+
+
+def ensure_indexes():
+    db_ensure_indexes("jobs")
+
+
+# --------------------------------------------------
+# Producer side
+# --------------------------------------------------
+def new_job(kind, key, payload):
+    now = datetime.now(timezone.utc)
+    return {
+        "_id": f"{kind}:{key}",
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "run_at": now,
+        "created_at": now
+    }
+
+
+def enqueue(kind, key, payload):
+    """
+    Adds a job. The _id is derived from (kind, key), so enqueueing the same
+    batch twice is a no-op. Returns False if the job already existed.
+    """
+    try:
+        jobs.insert_one(new_job(kind, key, payload))
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def enqueue_batch_analysis(batch_id):
+    return enqueue("analyze_batch", batch_id, {"batch_id": batch_id})
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+def claim(worker_id, lease_seconds=JOB_LEASE_SECONDS):
+    """
+    Atomically leases the next runnable job: a queued job whose run_at has
+    passed, or a running job whose lease expired (its worker died).
+    """
+    now = datetime.now(timezone.utc)
+    return jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker": worker_id,
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "started_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def extend_lease(job, lease_seconds=JOB_LEASE_SECONDS):
+    jobs.update_one(
+        {"_id": job["_id"], "worker": job["worker"], "status": "running"},
+        {"$set": {"lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}}
+    )
+
+
+def complete(job):
+    jobs.update_one(
+        {"_id": job["_id"], "worker": job["worker"]},
+        {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc)},
+         "$unset": {"lease_until": ""}}
+    )
+
+
+def defer(job, seconds):
+    """Puts a job back without using up an attempt (its input is not ready yet)."""
+    jobs.update_one(
+        {"_id": job["_id"], "worker": job["worker"]},
+        {"$set": {"status": "queued", "run_at": datetime.now(timezone.utc) + timedelta(seconds=seconds)},
+         "$inc": {"attempts": -1},
+         "$unset": {"lease_until": ""}}
+    )
+
+
+def fail(job, error, max_attempts=JOB_MAX_ATTEMPTS):
+    """Requeues with exponential backoff, or dead-letters after max_attempts."""
+    now = datetime.now(timezone.utc)
+    dead = job["attempts"] >= max_attempts
+    if dead:
+        update = {"$set": {"status": "dead", "error": str(error), "finished_at": now}}
+    else:
+        delay = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+        update = {"$set": {"status": "queued", "error": str(error), "run_at": now + timedelta(seconds=delay)}}
+    update["$unset"] = {"lease_until": ""}
+    result = jobs.update_one({"_id": job["_id"], "worker": job["worker"]}, update)
+
+    batch_ids = _batch_ids([job])
+    if dead and result.modified_count and batch_ids:
+        batches.update_many(
+            {"batch_id": {"$in": batch_ids}, "status": "processing"},
+            {"$set": {"status": "failed", "failed_at": now, "error": str(error)}}
+        )
+
+
+def _batch_ids(job_docs):
+    return [job["payload"]["batch_id"] for job in job_docs if job.get("kind") in BATCH_JOB_KINDS]
+
+
+def queue_depth():
+    return jobs.count_documents({"status": {"$in": ["queued", "running"]}})
+
+
+def requeue_dead(kind=None):
+    """Moves dead-lettered jobs back to the queue (after fixing the cause)."""
+    query = {"status": "dead"}
+    if kind:
+        query["kind"] = kind
+    dead = list(jobs.find(query, {"kind": 1, "payload": 1}))
+    if not dead:
+        return 0
+
+    requeued = jobs.update_many(
+        {"_id": {"$in": [job["_id"] for job in dead]}, "status": "dead"},
+        {"$set": {"status": "queued", "attempts": 0, "run_at": datetime.now(timezone.utc)}}
+    ).modified_count
+    batch_ids = _batch_ids(dead)
+    if batch_ids:
+        batches.update_many(
+            {"batch_id": {"$in": batch_ids}, "status": "failed"},
+            {"$set": {"status": "processing"}, "$unset": {"failed_at": "", "error": ""}}
+        )
+    return requeued
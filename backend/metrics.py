@@ -0,0 +1,266 @@
+"""
+In-process metrics with Prometheus text output (served at /metrics).
+
+Lock-light: every thread writes to its own shard of each metric, so the hot
+path is a bisect plus two list increments with no lock; shards are only
+summed when /metrics is scraped. Set METRICS_ENABLED=0 to turn it all off.
+benchmarks/bench_metrics.py --cpu-only measured about 4.4 us added to the
+16.8 us CPU side of a request. The end-to-end overhead (with round trips)
+has not been measured; the bench's default mode is the check for that.
+
+Metrics live in the process that records them. In queue mode the analysis
+and global_merge stages, ANALYZED_DOCS and ANALYSIS_SECONDS are recorded by
+the workers, which serve their own /metrics with
+`python -m backend.worker --metrics-port 9101` (serve() below).
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = []
+_collectors = []  # callables returning scrape-time samples, see register_collector
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class _Sharded:
+    """Per-thread shards, keyed by label values."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # taken once per thread, not per observation
+        _registry.append(self)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _merged(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        return shards
+
+
+class Counter(_Sharded):
+    def inc(self, amount=1, *label_values):
+        if not METRICS_ENABLED:
+            return
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def render(self):
+        totals = {}
+        for shard in self._merged():
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(totals.items()):
+            lines.append(f"{self.name}{_label_str(list(zip(self.label_names, key)))} {value}")
+        return lines
+
+
+class Histogram(_Sharded):
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        if not METRICS_ENABLED:
+            return
+        shard = self._shard()
+        series = shard.get(label_values)
+        if series is None:
+            # [per-bucket counts..., +Inf count] plus running sum
+            series = shard[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        totals = {}
+        for shard in self._merged():
+            for key, (counts, total) in list(shard.items()):
+                agg = totals.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+                for i, c in enumerate(counts):
+                    agg[0][i] += c
+                agg[1] += total
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(totals.items()):
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, c in zip(self.buckets + ("+Inf",), counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_label_str(labels + [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(labels)} {total}")
+            lines.append(f"{self.name}_count{_label_str(labels)} {cumulative}")
+        return lines
+
+
+class timed:
+    """with timed(STAGE_SECONDS, "insert"): ... -- observes elapsed seconds."""
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, *labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+# =========================
+# PIPELINE METRICS
+# =========================
+STAGE_SECONDS = Histogram(
+    "feedback_stage_seconds", "Latency of each process_feedback stage", ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "feedback_request_seconds", "End-to-end process_feedback latency", ["path"]
+)
+ANALYZED_DOCS = Counter(
+    "analysis_documents_total", "Feedbacks run through analyze_feedback_batch"
+)
+ANALYSIS_SECONDS = Counter(
+    "analysis_seconds_total", "Time spent in analyze_feedback_batch (docs/sec = rate(docs)/rate(seconds))"
+)
+BATCH_FILL_SECONDS = Histogram(
+    "batch_fill_seconds", "Time from batch creation to sealing",
+    buckets=(60, 300, 900, 3600, 6 * 3600, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600)
+)
+MONGO_ROUND_TRIPS = Histogram(
+    "mongo_round_trips_per_request", "Mongo commands issued per ingest request",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 25)
+)
+MONGO_COMMANDS = Counter(
+    "mongo_commands_total", "Mongo commands by name", ["command"]
+)
+
+
+def observe_batch_fill(created_at, sealed_at):
+    if created_at is None:
+        return
+    if created_at.tzinfo is None:  # pymongo hands back naive UTC
+        created_at = created_at.replace(tzinfo=sealed_at.tzinfo)
+    BATCH_FILL_SECONDS.observe((sealed_at - created_at).total_seconds())
+
+
+# =========================
+# MONGO ROUND-TRIP COUNTING
+# =========================
+_round_trips = contextvars.ContextVar("mongo_round_trips", default=None)
+
+
+class RoundTripListener(monitoring.CommandListener):
+    """Passed to every MongoClient; counts commands for the current request."""
+
+    def started(self, event):
+        counter = _round_trips.get()
+        if counter is not None:
+            counter[0] += 1
+        MONGO_COMMANDS.inc(1, event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+LISTENER = RoundTripListener()
+# Command monitoring makes pymongo build an event per command, so skip it when disabled
+EVENT_LISTENERS = [LISTENER] if METRICS_ENABLED else []
+
+
+class count_round_trips:
+    """Counts Mongo commands issued inside the block into MONGO_ROUND_TRIPS."""
+
+    def __enter__(self):
+        self.counter = [0]
+        self.token = _round_trips.set(self.counter)
+        return self
+
+    def __exit__(self, *exc):
+        _round_trips.reset(self.token)
+        MONGO_ROUND_TRIPS.observe(self.counter[0])
+        return False
+
+
+# =========================
+# EXPOSITION
+# =========================
+def register_collector(collect):
+    """
+    For state a module already counts itself: `collect()` returns render()
+    samples and is called on every scrape, in the API server and workers alike.
+    """
+    _collectors.append(collect)
+
+
+def render(samples=()):
+    """
+    Prometheus text format. `samples` are (name, type, value, labels) tuples
+    sampled at scrape time (queue depth, admission counters, ...).
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    samples = list(samples)
+    for collect in _collectors:
+        samples.extend(collect())
+    typed = set()
+    for name, kind, value, labels in samples:
+        if name not in typed:
+            lines.append(f"# TYPE {name} {kind}")
+            typed.add(name)
+        lines.append(f"{name}{_label_str(sorted(labels.items()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # one line per scrape is noise
+
+
+def serve(port, host="0.0.0.0"):
+    """Serves /metrics for a process without a web server (workers); returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
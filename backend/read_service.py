@@ -0,0 +1,149 @@
+"""
+Read side for server.py: filtered, keyset-paginated listings.
+
+Pages are ordered by (created_at, _id) descending; the cursor is the
+(created_at, _id) of the last row, so every page costs one indexed range
+scan no matter how deep the client pages. Legacy global_issues without
+created_at are backfilled (backend.db) before the first issues page.
+"""
+import asyncio
+import base64
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import BSONError
+
+from backend.async_db import adb
+from backend.db import ensure_indexes
+
+FEEDBACK_PROJECTION = {
+    "location": 1,
+    "feedback.type": 1,
+    "feedback.original_text": 1,
+    "feedback.rating": 1,
+    "ai": 1,
+    "created_at": 1,
+}
+
+ISSUE_PROJECTION = {
+    "issue_key": 1,
+    "category": 1,
+    "issue_text": 1,
+    "total_reports": 1,
+    "priority": 1,
+    "districts": 1,
+    "created_at": 1,
+    "last_updated": 1,
+}
+
+MAX_PAGE_SIZE = 200
+
+_issues_ready = False
+
+
+# --------------------------------------------------
+# Cursor
+# --------------------------------------------------
+def encode_cursor(doc):
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Raises ValueError for a malformed cursor."""
+    try:
+        created_at, _id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(_id)
+    except (ValueError, BSONError) as e:  # bad base64 / utf-8 / date are ValueErrors, a bad _id is InvalidId
+        raise ValueError("invalid cursor") from e
+
+
+def _after_cursor(cursor):
+    created_at, _id = decode_cursor(cursor)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": _id}}
+    ]}
+
+
+def _time_range(since, until):
+    rng = {}
+    if since:
+        rng["$gte"] = since
+    if until:
+        rng["$lt"] = until
+    return {"created_at": rng} if rng else {}
+
+
+# --------------------------------------------------
+# Serialization
+# --------------------------------------------------
+def _plain(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+async def _page(collection, query, projection, cursor, limit):
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = {"$and": [query, _after_cursor(cursor)]} if query else _after_cursor(cursor)
+    docs = await (
+        collection.find(query, projection)
+        .sort([("created_at", -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return {
+        "items": [_plain(doc) for doc in docs],
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None,
+    }
+
+
+# --------------------------------------------------
+# Listings
+# --------------------------------------------------
+async def list_feedback(district=None, constituency=None, category=None, priority=None,
+                        since=None, until=None, cursor=None, limit=50):
+    query = _time_range(since, until)
+    if district:
+        query["location.district"] = district
+    if constituency:
+        query["location.constituency"] = constituency
+    if category:
+        query["ai.category"] = category
+    if priority:
+        query["ai.priority"] = priority
+    return await _page(adb["feedbacks"], query, FEEDBACK_PROJECTION, cursor, limit)
+
+
+def issue_query(district=None, category=None, priority=None, since=None, until=None):
+    """A district matches every issue reported from it (an issue spans all its `districts`)."""
+    query = _time_range(since, until)
+    if district:
+        query["districts"] = district
+    if category:
+        query["category"] = category
+    if priority:
+        query["priority"] = priority
+    return query
+
+
+async def list_issues(district=None, category=None, priority=None, since=None, until=None, cursor=None, limit=50):
+    global _issues_ready
+    if not _issues_ready:
+        await asyncio.to_thread(ensure_indexes, "global_issues")
+        _issues_ready = True
+
+    query = issue_query(district, category, priority, since, until)
+    return await _page(adb["global_issues"], query, ISSUE_PROJECTION, cursor, limit)
@@ -0,0 +1,176 @@
+"""
+Pre-aggregated feedback counts for the dashboard charts.
+
+One feedback_rollups row per (district, constituency, category, priority,
+day) holding the number of analyzed feedbacks. analyze_and_store_batch
+adds to it with $inc upserts as it stores AI results, so the dashboard
+sums a few hundred rows instead of counting the feedbacks collection.
+
+The $inc path only counts what is analyzed from now on, so history has to
+be counted once by a rebuild, a deploy step like the index migration.
+A completed rebuild leaves a "rollups" marker in schema_meta; until then
+the dashboard says its counts are incomplete (rollups_built()).
+
+The rebuild recounts into a shadow collection and renames it over the live
+one, so an $inc that lands in between is lost: it refuses to run while
+analysis jobs are running (--force to override), and holds a lease in
+schema_meta so two rebuilds never race.
+
+    python -m backend.rollups rebuild     # first deploy, or after drift
+"""
+import argparse
+import logging
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from backend.db import db, feedbacks
+
+logger = logging.getLogger(__name__)
+
+feedback_rollups = db["feedback_rollups"]
+schema_meta = db["schema_meta"]
+
+REBUILD_LEASE_SECONDS = 3600
+
+ROLLUP_FIELDS = ("district", "constituency", "category", "priority", "day")
+
+
+def rollup_key(doc):
+    return (
+        doc["location"]["district"],
+        doc["location"]["constituency"],
+        doc["ai"].get("category", "Other"),
+        doc["ai"].get("priority", "Low"),
+        doc["created_at"].strftime("%Y-%m-%d")  # UTC day
+    )
+
+
+def rollup_ops(docs):
+    """One $inc upsert per distinct key in `docs` (usually one or two per batch)."""
+    counts = {}
+    for doc in docs:
+        key = rollup_key(doc)
+        counts[key] = counts.get(key, 0) + 1
+
+    now = datetime.now(timezone.utc)
+    return [
+        UpdateOne(
+            dict(zip(ROLLUP_FIELDS, key)),
+            {"$inc": {"count": count}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for key, count in counts.items()
+    ]
+
+
+def apply_rollups(docs):
+    ops = rollup_ops(docs)
+    if ops:
+        feedback_rollups.bulk_write(ops, ordered=False)
+
+
+# --------------------------------------------------
+# Rebuild
+# --------------------------------------------------
+def rebuild_rollups(suffix):
+    """Recounts every analyzed feedback into a shadow collection; returns {live: shadow}."""
+    shadow = f"feedback_rollups_rebuild_{suffix}"
+    now = datetime.now(timezone.utc)
+    feedbacks.aggregate([
+        {"$match": {"ai": {"$exists": True}}},
+        {"$group": {
+            "_id": {
+                "district": "$location.district",
+                "constituency": "$location.constituency",
+                "category": {"$ifNull": ["$ai.category", "Other"]},
+                "priority": {"$ifNull": ["$ai.priority", "Low"]},
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+            },
+            "count": {"$sum": 1}
+        }},
+        {"$replaceWith": {"$mergeObjects": ["$_id", {"count": "$count", "updated_at": now}]}},
+        {"$out": shadow},
+    ], allowDiskUse=True)
+    return {"feedback_rollups": shadow}
+
+
+def mark_rollups_built():
+    """Called once a rebuild has been swapped in."""
+    schema_meta.update_one(
+        {"_id": "rollups"},
+        {"$set": {"built_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+def rollups_built():
+    return schema_meta.find_one({"_id": "rollups", "built_at": {"$exists": True}}) is not None
+
+
+class RebuildInProgress(Exception):
+    pass
+
+
+@contextmanager
+def rebuild_lease(owner, seconds=REBUILD_LEASE_SECONDS):
+    """
+    Held around anything that swaps feedback_rollups. Taken by upserting an
+    expired (or missing) lease; a live one makes the upsert collide on _id.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        schema_meta.update_one(
+            {"_id": "rollups_rebuild", "until": {"$lt": now}},
+            {"$set": {"owner": owner, "until": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        held = schema_meta.find_one({"_id": "rollups_rebuild"}) or {}
+        raise RebuildInProgress(f"rollups rebuild already running ({held.get('owner')})") from None
+    try:
+        yield
+    finally:
+        schema_meta.delete_one({"_id": "rollups_rebuild", "owner": owner})
+
+
+def running_analysis_jobs():
+    return db["jobs"].count_documents({"kind": "analyze_batch", "status": "running"})
+
+
+def rebuild(owner="rollups"):
+    # backfill imports this module, so take swap_in lazily
+    from backend.backfill import swap_in
+
+    suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    with rebuild_lease(f"{owner}-{suffix}"):
+        swap_in(rebuild_rollups(suffix))
+        mark_rollups_built()
+    logger.info("Rollups rebuilt: %d rows", feedback_rollups.estimated_document_count())
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Feedback rollups: python -m backend.rollups rebuild")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--force", action="store_true", help="rebuild even while analysis jobs are running")
+    args = parser.parse_args(argv)
+
+    running = running_analysis_jobs()
+    if running and not args.force:
+        logger.error("%d analysis jobs are running; their rollup counts would be lost. "
+                     "Stop the workers or pass --force.", running)
+        return 1
+    try:
+        rebuild()
+    except RebuildInProgress as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Background analysis worker.
+
+    python -m backend.worker                # one process
+    python -m backend.worker --processes 4  # N processes
+    python -m backend.worker --processes 4 --metrics-port 9101   # /metrics on 9101..9104
+
+Analysis and global-merge metrics are recorded here, not in the API
+server, so scrape every worker process on its own port.
+"""
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import multiprocessing
+from contextlib import contextmanager
+
+from pymongo.errors import PyMongoError
+
+from backend import job_queue, metrics
+from backend.feedback_service import BATCH_NOT_READY_RETRY_SECONDS, BatchNotReady, analyze_and_store_batch
+
+logger = logging.getLogger(__name__)
+LOG_FORMAT = "%(asctime)s %(processName)s %(levelname)s %(message)s"
+
+HANDLERS = {
+    "analyze_batch": lambda payload: analyze_and_store_batch(payload["batch_id"]),
+}
+
+
+def run_job(job):
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        raise ValueError(f"No handler for job kind {job['kind']}")
+    if handler(job["payload"]) is False:
+        raise RuntimeError("handler reported failure")
+
+
+@contextmanager
+def kept_leased(job, lease_seconds=job_queue.JOB_LEASE_SECONDS):
+    """Renews the job's lease every third of its length while the block runs."""
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(lease_seconds / 3):
+            try:
+                job_queue.extend_lease(job, lease_seconds)
+            except PyMongoError as e:
+                logger.warning("Lease on %s not extended: %s", job["_id"], e)
+
+    thread = threading.Thread(target=renew, name=f"lease-{job['_id']}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def worker_loop(poll_interval=1.0, max_jobs=None):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Worker %s started", worker_id)
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = job_queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            with kept_leased(job):
+                run_job(job)
+            job_queue.complete(job)
+        except BatchNotReady as e:
+            logger.info("Job %s deferred: %s", job["_id"], e)
+            job_queue.defer(job, BATCH_NOT_READY_RETRY_SECONDS)
+        except Exception as e:
+            logger.exception("Job %s failed (attempt %d)", job["_id"], job["attempts"])
+            job_queue.fail(job, e)
+        done += 1
+
+
+def _serve_metrics(port):
+    if port:
+        metrics.serve(port)
+        logger.info("Metrics on :%d/metrics", port)
+
+
+def _process_main(poll_interval, metrics_port=0):
+    # spawned processes start with logging unconfigured
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    _serve_metrics(metrics_port)
+    worker_loop(poll_interval)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    parser = argparse.ArgumentParser(description="Run background analysis workers")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("WORKER_METRICS_PORT", 0)),
+                        help="serve /metrics here (process i uses port + i); 0 = off")
+    args = parser.parse_args(argv)
+
+    job_queue.ensure_indexes()
+    if args.processes == 1:
+        _serve_metrics(args.metrics_port)
+        worker_loop(args.poll_interval)
+        return 0
+
+    # spawn, not fork: each process must open its own MongoClient
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_process_main, args=(args.poll_interval, args.metrics_port + i if args.metrics_port else 0))
+        for i in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
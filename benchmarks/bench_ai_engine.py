@@ -0,0 +1,124 @@
+"""
+Throughput / latency benchmark for backend/ai_engine.py.
+
+    python -m benchmarks.bench_ai_engine --sizes 1000 10000 100000 --out bench.json
+    python -m benchmarks.bench_ai_engine --sizes 10000 --compare bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from backend.ai_engine import (
+    analyze_feedback_batch, detect_category, detect_language, detect_priority, translate_to_english
+)
+from benchmarks.corpus import generate_corpus
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def bench_per_doc(fn, inputs):
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for item in inputs:
+        t0 = clock()
+        fn(item)
+        latencies.append(clock() - t0)
+    total = clock() - start
+    latencies.sort()
+    return {
+        "docs": len(inputs),
+        "seconds": total,
+        "docs_per_sec": len(inputs) / total if total else 0.0,
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p95_us": _percentile(latencies, 95) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+    }
+
+
+def bench_batch(fn, inputs):
+    start = time.perf_counter()
+    fn(inputs)
+    total = time.perf_counter() - start
+    return {
+        "docs": len(inputs),
+        "seconds": total,
+        "docs_per_sec": len(inputs) / total if total else 0.0,
+        "mean_us": total / len(inputs) * 1e6 if inputs else 0.0,
+    }
+
+
+def run(sizes, seed):
+    results = {}
+    for size in sizes:
+        corpus = list(generate_corpus(size, seed=seed))
+        english = [translate_to_english(text) for text in corpus]
+        results[str(size)] = {
+            "translate_to_english": bench_per_doc(translate_to_english, corpus),
+            "detect_language": bench_per_doc(detect_language, corpus),
+            "detect_category": bench_per_doc(detect_category, english),
+            "detect_priority": bench_per_doc(detect_priority, english),
+            "analyze_feedback_batch": bench_batch(analyze_feedback_batch, corpus),
+        }
+        print(f"size={size}: analyze_feedback_batch "
+              f"{results[str(size)]['analyze_feedback_batch']['docs_per_sec']:.0f} docs/s")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Returns a list of (size, stage, old, new) where throughput dropped more than threshold."""
+    regressions = []
+    for size, stages in current.items():
+        for stage, stats in stages.items():
+            old = baseline.get(size, {}).get(stage)
+            if not old or not old["docs_per_sec"]:
+                continue
+            if stats["docs_per_sec"] < old["docs_per_sec"] * (1 - threshold):
+                regressions.append((size, stage, old["docs_per_sec"], stats["docs_per_sec"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed throughput drop (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "results": run(args.sizes, args.seed),
+    }
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for size, stage, old, new in regressions:
+            print(f"❌ REGRESSION size={size} {stage}: {old:.0f} -> {new:.0f} docs/s")
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
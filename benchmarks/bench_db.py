@@ -0,0 +1,31 @@
+"""
+Database for benchmarks that write to, and drop, a MongoDB database.
+
+MONGODB_DB is deliberately not used: in a shell or .env it usually points
+at real data. The name comes from BENCH_MONGODB_DB and must end in "_bench".
+"""
+import os
+
+BENCH_DB_SUFFIX = "_bench"
+
+
+def bench_db_name(default="feedback_bench"):
+    name = os.getenv("BENCH_MONGODB_DB", default)
+    if not name.endswith(BENCH_DB_SUFFIX):
+        raise SystemExit(
+            f"Refusing to benchmark against {name!r}: it gets dropped, so the name must end in {BENCH_DB_SUFFIX!r}"
+        )
+    return name
+
+
+def use_bench_db(default="feedback_bench"):
+    """Points backend.db at the bench database; call before importing backend modules."""
+    name = bench_db_name(default)
+    os.environ["MONGODB_DB"] = name
+    return name
+
+
+def drop_bench_db(client, name):
+    if not name.endswith(BENCH_DB_SUFFIX):
+        raise SystemExit(f"Refusing to drop {name!r}: not a benchmark database")
+    client.drop_database(name)
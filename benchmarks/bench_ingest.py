@@ -0,0 +1,114 @@
+"""
+Sync vs async ingest path against a local mongod.
+
+    MONGODB_URI=mongodb://localhost:27017/ python -m benchmarks.bench_ingest --requests 5000 --concurrency 200
+
+Writes go to the BENCH_MONGODB_DB database (default "feedback_bench"; the
+name must end in "_bench"), which is dropped before each run. MONGODB_DB
+is ignored. Analysis is queued, not run, so this measures the
+submit path only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_db import drop_bench_db, use_bench_db
+
+use_bench_db()
+os.environ.setdefault("ANALYSIS_MODE", "queue")
+
+from backend import feedback_service  # noqa: E402
+from backend.db import client, DB_NAME  # noqa: E402
+from backend.feedback_service import process_feedback  # noqa: E402
+from backend.feedback_service_async import process_feedback_async  # noqa: E402
+from benchmarks.bench_ai_engine import _percentile  # noqa: E402
+from benchmarks.corpus import generate_corpus  # noqa: E402
+
+
+def make_forms(n, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            "district": f"D{rng.randrange(38)}",
+            "constituency": f"C{rng.randrange(234)}",
+            "name": "bench",
+            "mobile_no": f"9{rng.randrange(10 ** 9):09d}",
+            "type_of_feedback": "Complaint",
+            "feedback_text": text,
+        }
+        for text in generate_corpus(n, seed=seed)
+    ]
+
+
+def _summary(latencies, total):
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": total,
+        "req_per_sec": len(latencies) / total if total else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1e3,
+        "p95_ms": _percentile(latencies, 95) * 1e3,
+        "p99_ms": _percentile(latencies, 99) * 1e3,
+    }
+
+
+def run_sync(forms, concurrency):
+    def timed(form):
+        t0 = time.perf_counter()
+        process_feedback(form)
+        return time.perf_counter() - t0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, forms))
+    return _summary(latencies, time.perf_counter() - start)
+
+
+async def run_async(forms, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def timed(form):
+        async with gate:
+            t0 = time.perf_counter()
+            await process_feedback_async(form)
+            return time.perf_counter() - t0
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(form) for form in forms))
+    return _summary(list(latencies), time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for mode, seed in (("sync", args.seed), ("async", args.seed + 1)):
+        drop_bench_db(client, DB_NAME)
+        feedback_service._indexes_ready = False  # dropped with the database
+        forms = make_forms(args.requests, seed)
+        if mode == "sync":
+            report[mode] = run_sync(forms, args.concurrency)
+        else:
+            report[mode] = asyncio.run(run_async(forms, args.concurrency))
+        r = report[mode]
+        print(f"{mode:>5}: {r['req_per_sec']:.0f} req/s  p50={r['p50_ms']:.1f}ms  "
+              f"p95={r['p95_ms']:.1f}ms  p99={r['p99_ms']:.1f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Overhead of the /metrics instrumentation on the ingest path.
+
+    MONGODB_URI=mongodb://localhost:27017/ python -m benchmarks.bench_metrics --requests 3000
+    python -m benchmarks.bench_metrics --cpu-only
+
+What has been measured is the CPU side only (--cpu-only): 16.8 us bare,
+21.2 us instrumented, so about 4.4 us added per request. That is ~26% of
+the CPU work, with no round trips in it. There is no end-to-end figure
+yet, so the "<2% of a request" target is unverified until the default run
+passes against a real mongod.
+
+The default run calls process_feedback end to end (inline analysis, so the
+analysis and global-merge stages are included) in child processes with
+METRICS_ENABLED=1 and =0, alternating, and compares the best runs. It is
+the acceptance check for the 2% target: exits 1 if the overhead is over
+--threshold. Writes go to BENCH_MONGODB_DB (default "feedback_bench", must
+end in "_bench"), dropped before each run.
+
+--cpu-only needs no mongod: it times the CPU side of a request (doc build,
+dedupe hashing, analysis every 15 requests) bare and with the same timer /
+counter calls, and reports the absolute cost per request.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.bench_db import drop_bench_db, use_bench_db
+
+use_bench_db()
+
+BATCH = 15
+ROUND_TRIPS = 2  # allocate, insert (plus an enqueue for the request that seals)
+
+
+# ----------------------------------------
+# End to end (child process per run)
+# ----------------------------------------
+def _child(requests):
+    os.environ["ANALYSIS_MODE"] = "inline"
+    from backend.db import client, DB_NAME
+    from backend.feedback_service import process_feedback
+    from benchmarks.bench_ingest import make_forms
+
+    drop_bench_db(client, DB_NAME)
+    forms = make_forms(requests, seed=7)
+    process_feedback(forms[0])  # indexes, lexicon
+    t0 = time.perf_counter()
+    for form in forms[1:]:
+        process_feedback(form)
+    print(json.dumps({"seconds": time.perf_counter() - t0}))
+
+
+def _run_child(requests, enabled):
+    env = dict(os.environ, METRICS_ENABLED="1" if enabled else "0")
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_metrics", "--child", "--requests", str(requests)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])["seconds"]
+
+
+def end_to_end(requests, repeats):
+    runs = {True: [], False: []}
+    for _ in range(repeats):
+        for enabled in (False, True):
+            runs[enabled].append(_run_child(requests, enabled))
+    base, inst = min(runs[False]), min(runs[True])
+    return {
+        "mode": "end_to_end",
+        "requests": requests,
+        "bare_us_per_request": base / requests * 1e6,
+        "instrumented_us_per_request": inst / requests * 1e6,
+        "overhead_pct": (inst - base) / base * 100,
+    }
+
+
+# ----------------------------------------
+# CPU only
+# ----------------------------------------
+def cpu_only(requests, repeats):
+    from backend import metrics
+    from backend.ai_engine import analyze_feedback_batch
+    from backend.feedback_service import build_feedback_doc
+    from benchmarks.bench_ingest import make_forms
+
+    event = SimpleNamespace(command_name="insert")
+
+    def bare(forms):
+        texts = []
+        for form in forms:
+            texts.append(build_feedback_doc(form)["feedback"]["original_text"])
+            if len(texts) == BATCH:
+                analyze_feedback_batch(texts)
+                texts = []
+
+    def instrumented(forms):
+        texts = []
+        for form in forms:
+            with metrics.timed(metrics.REQUEST_SECONDS, "sync"), metrics.count_round_trips():
+                with metrics.timed(metrics.STAGE_SECONDS, "hashing"):
+                    doc = build_feedback_doc(form)
+                for _ in range(ROUND_TRIPS):
+                    metrics.LISTENER.started(event)
+                with metrics.timed(metrics.STAGE_SECONDS, "insert"):
+                    pass
+                with metrics.timed(metrics.STAGE_SECONDS, "batch_allocation"):
+                    pass
+            texts.append(doc["feedback"]["original_text"])
+            if len(texts) == BATCH:
+                with metrics.timed(metrics.STAGE_SECONDS, "analysis") as t:
+                    analyze_feedback_batch(texts)
+                metrics.ANALYZED_DOCS.inc(len(texts))
+                metrics.ANALYSIS_SECONDS.inc(time.perf_counter() - t.start)
+                with metrics.timed(metrics.STAGE_SECONDS, "global_merge"):
+                    pass
+                texts = []
+
+    def best_of(fn, forms):
+        best = float("inf")
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn(forms)
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    forms = make_forms(requests, seed=7)
+    bare(forms[:500])  # warm the lexicon / matcher
+    base, inst = best_of(bare, forms), best_of(instrumented, forms)
+    return {
+        "mode": "cpu_only",
+        "requests": requests,
+        "bare_us_per_request": base / requests * 1e6,
+        "instrumented_us_per_request": inst / requests * 1e6,
+        "added_us_per_request": (inst - base) / requests * 1e6,
+        "added_pct_of_cpu_side": (inst - base) / base * 100,  # not of a request: no round trips here
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.02)
+    parser.add_argument("--cpu-only", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.requests)
+        return 0
+    if args.cpu_only:
+        print(json.dumps(cpu_only(args.requests, args.repeats), indent=2))
+        return 0
+
+    report = end_to_end(args.requests, args.repeats)
+    print(json.dumps(report, indent=2))
+    overhead = report["overhead_pct"] / 100
+    if overhead > args.threshold:
+        print(f"❌ Metrics overhead {overhead:.1%} is over {args.threshold:.0%}")
+        return 1
+    print(f"✅ Metrics overhead {overhead:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
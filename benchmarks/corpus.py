@@ -0,0 +1,60 @@
+import random
+
+from backend.ai_engine import (
+    CATEGORY_KEYWORDS, HIGH_PRIORITY_WORDS, MEDIUM_PRIORITY_WORDS, TAMIL_KEYWORDS, load_lexicon, LEXICON_PATH
+)
+
+# ---------------- VOCABULARY ----------------
+ENGLISH_FILLER = [
+    "the", "in", "our", "area", "is", "not", "for", "since", "please", "there",
+    "no", "very", "near", "street", "people", "we", "are", "facing", "from", "and",
+    "morning", "night", "still", "again", "nobody", "came", "to", "check", "this"
+]
+
+TAMIL_SCRIPT = [
+    "தண்ணீர்", "வரவில்லை", "சாலை", "மிகவும்", "மோசம்", "குப்பை", "மின்சாரம்",
+    "இல்லை", "பிரச்சனை", "மருத்துவமனை", "பள்ளி", "பேருந்து", "ஆபத்து", "நாட்கள்"
+]
+
+DURATIONS = ["2 days", "3 days", "1 week", "5days", "2 weeks"]
+
+
+def _vocabularies():
+    keywords = [w for words in CATEGORY_KEYWORDS.values() for w in words]
+    return {
+        "en": keywords + HIGH_PRIORITY_WORDS + MEDIUM_PRIORITY_WORDS,
+        "tanglish": TAMIL_KEYWORDS + list(load_lexicon(LEXICON_PATH)),
+    }
+
+
+# ---------------- GENERATOR ----------------
+def generate_corpus(size, seed=42, mix=(0.45, 0.4, 0.15)):
+    """
+    Yields `size` synthetic feedback texts. `mix` is the share of English,
+    romanized Tamil and Tamil-script texts. Same seed, same corpus.
+    """
+    rng = random.Random(seed)
+    vocab = _vocabularies()
+    styles = ["en", "tanglish", "ta"]
+
+    for _ in range(size):
+        style = rng.choices(styles, weights=mix)[0]
+        # Most complaints are a sentence or two, a few are long rants
+        length = max(2, min(120, int(rng.lognormvariate(2.5, 0.6))))
+
+        words = []
+        for _ in range(length):
+            roll = rng.random()
+            if style == "ta":
+                words.append(rng.choice(TAMIL_SCRIPT) if roll < 0.8 else rng.choice(vocab["tanglish"]))
+            elif roll < 0.25:
+                words.append(rng.choice(vocab[style]))
+            elif roll < 0.35 and style == "en":
+                words.append(rng.choice(vocab["tanglish"]))
+            else:
+                words.append(rng.choice(ENGLISH_FILLER))
+
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(DURATIONS))
+        text = " ".join(words)
+        yield text.capitalize() + rng.choice([".", "!", "", "!!", "..."])
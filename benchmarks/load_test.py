@@ -0,0 +1,313 @@
+"""
+Open-loop load test for server.py.
+
+    python -m benchmarks.load_test --launch --scenario mixed --rate 200 --duration 60
+    python -m benchmarks.load_test --launch --scenario hotspot --rate 300
+    python -m benchmarks.load_test --launch --scenario bulk --rate 2 --bulk-size 1000
+    python -m benchmarks.load_test --url http://10.0.0.5:8000 --scenario mixed --rate 500
+
+Requests leave on a Poisson schedule whether or not earlier ones have
+answered, and latency is measured from the scheduled send time, so a
+stalled server shows up as latency instead of a quietly lower offered rate.
+Locations are drawn from TN_Assembly_Constituencies_FULL.json: districts
+weighted by their number of seats, constituencies Zipf-skewed (--skew)
+inside each district. Each request comes from one of --clients synthetic
+kiosks (X-Forwarded-For; point TRUSTED_PROXIES at the load generator when
+testing a remote server) with a fresh mobile number.
+
+Scenarios:
+  mixed    single submissions across the state
+  hotspot  every submission to one constituency (batch allocator contention)
+  bulk     NDJSON uploads of --bulk-size records to /api/feedback/bulk
+
+--launch starts uvicorn and `--workers` analysis workers against
+BENCH_MONGODB_DB (default "feedback_load_bench", must end in "_bench",
+dropped first) on a local mongod. Batch fill and analysis lag are read back
+from that database after the run; against --url they are read, never
+dropped, from --db (default MONGODB_DB).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import accumulate
+
+import httpx
+
+from benchmarks.bench_ai_engine import _percentile
+from benchmarks.bench_db import bench_db_name, drop_bench_db
+from benchmarks.corpus import generate_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSTITUENCIES_FILE = os.path.join(ROOT, "TN_Assembly_Constituencies_FULL.json")
+
+
+# ----------------------------------------
+# Synthetic traffic
+# ----------------------------------------
+def location_weights(skew=1.0, path=CONSTITUENCIES_FILE):
+    """[(district, constituency)] and matching weights."""
+    with open(path, "r", encoding="utf-8") as f:
+        districts = json.load(f)
+
+    locations, weights = [], []
+    for district, info in districts.items():
+        seats = [c["en"] for c in info["constituencies"]]
+        zipf = [1 / (rank + 1) ** skew for rank in range(len(seats))]
+        total = sum(zipf)
+        for constituency, w in zip(seats, zipf):
+            locations.append((district, constituency))
+            weights.append(len(seats) * w / total)
+    return locations, weights
+
+
+class Traffic:
+    def __init__(self, seed=7, skew=1.0, clients=500, hotspot=None):
+        self.rng = random.Random(seed)
+        self.locations, weights = location_weights(skew)
+        self.cum_weights = list(accumulate(weights))
+        self.texts = list(generate_corpus(2000, seed=seed))
+        self.clients = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(clients)]
+        self.hotspot = hotspot
+
+    def form(self):
+        if self.hotspot:
+            district, constituency = self.hotspot
+        else:
+            district, constituency = self.rng.choices(self.locations, cum_weights=self.cum_weights)[0]
+        return {
+            "district": district,
+            "constituency": constituency,
+            "name": "load",
+            "mobile_no": f"9{self.rng.randrange(10 ** 9):09d}",
+            "type_of_feedback": "Complaint",
+            "feedback_text": self.rng.choice(self.texts),
+        }
+
+    def client_ip(self):
+        return self.rng.choice(self.clients)
+
+
+def single_request(traffic):
+    async def send(client):
+        form = traffic.form()
+        resp = await client.post("/api/feedback", json=form, headers={"X-Forwarded-For": traffic.client_ip()})
+        return resp.status_code, 1
+    return send
+
+
+def bulk_request(traffic, size):
+    async def send(client):
+        body = "\n".join(json.dumps(traffic.form()) for _ in range(size))
+        resp = await client.post(
+            "/api/feedback/bulk", content=body.encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson", "X-Forwarded-For": traffic.client_ip()}
+        )
+        accepted = resp.json().get("accepted", 0) if resp.status_code == 200 else 0
+        return resp.status_code, accepted
+    return send
+
+
+# ----------------------------------------
+# Open-loop driver
+# ----------------------------------------
+async def run_open_loop(url, send, rate, duration, max_inflight, timeout, seed):
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    results = []  # (latency, status, records); status None = transport error
+    tasks = set()
+    skipped = 0
+
+    async def fire(scheduled):
+        try:
+            status, records = await send(client)
+        except httpx.HTTPError:
+            status, records = None, 0
+        results.append((loop.time() - scheduled, status, records))
+
+    limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        start = next_at = loop.time()
+        while next_at - start < duration:
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= max_inflight:
+                skipped += 1  # the client itself is saturated; counted, not hidden
+            else:
+                task = asyncio.create_task(fire(next_at))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_at += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+
+    return summarize(results, skipped, rate, elapsed)
+
+
+def summarize(results, skipped, rate, elapsed):
+    ok = sorted(lat for lat, status, _ in results if status is not None and status < 400)
+    statuses = {}
+    for _, status, _ in results:
+        key = str(status) if status is not None else "transport_error"
+        statuses[key] = statuses.get(key, 0) + 1
+    sent = len(results) + skipped
+    shed = statuses.get("429", 0) + statuses.get("503", 0)
+    failed = sum(n for key, n in statuses.items() if key not in ("200", "429", "503"))
+    return {
+        "offered_rate": rate,
+        "seconds": elapsed,
+        "requests": sent,
+        "req_per_sec": len(ok) / elapsed if elapsed else 0.0,
+        "records_per_sec": sum(r for _, status, r in results if status == 200) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(ok, 50) * 1e3,
+        "p95_ms": _percentile(ok, 95) * 1e3,
+        "p99_ms": _percentile(ok, 99) * 1e3,
+        "error_rate": (failed + skipped) / sent if sent else 0.0,
+        "shed_rate": shed / sent if sent else 0.0,
+        "client_skipped": skipped,
+        "statuses": statuses,
+    }
+
+
+# ----------------------------------------
+# Lag (read back from Mongo)
+# ----------------------------------------
+def _seconds(later, earlier):
+    return (later - earlier).total_seconds()
+
+
+def batch_lag(db, since, drain):
+    """Fill time (created -> sealed) and analysis lag (sealed -> completed) of batches from this run."""
+    batches = db["batches"]
+    deadline = time.monotonic() + drain
+    while batches.count_documents({"created_at": {"$gte": since}, "status": "processing"}) and time.monotonic() < deadline:
+        time.sleep(1)
+
+    fill, analysis = [], []
+    for batch in batches.find({"created_at": {"$gte": since}, "sealed_at": {"$exists": True}},
+                              {"created_at": 1, "sealed_at": 1, "completed_at": 1}):
+        fill.append(_seconds(batch["sealed_at"], batch["created_at"]))
+        if batch.get("completed_at"):
+            analysis.append(_seconds(batch["completed_at"], batch["sealed_at"]))
+    fill.sort()
+    analysis.sort()
+    return {
+        "sealed_batches": len(fill),
+        "analyzed_batches": len(analysis),
+        "still_processing": batches.count_documents({"created_at": {"$gte": since}, "status": "processing"}),
+        "fill_p50_s": _percentile(fill, 50),
+        "fill_p95_s": _percentile(fill, 95),
+        "analysis_lag_p50_s": _percentile(analysis, 50),
+        "analysis_lag_p95_s": _percentile(analysis, 95),
+        "analysis_lag_p99_s": _percentile(analysis, 99),
+    }
+
+
+# ----------------------------------------
+# Local server
+# ----------------------------------------
+def _wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/metrics", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+@contextmanager
+def launched(port, workers, env):
+    procs = [subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+    )]
+    if workers:
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "backend.worker", "--processes", str(workers), "--poll-interval", "0.2"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        ))
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(url)
+        yield url
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["mixed", "hotspot", "bulk"], default="mixed")
+    parser.add_argument("--rate", type=float, default=100, help="requests/sec (uploads/sec for bulk)")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--launch", action="store_true", help="start uvicorn + workers locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--hotspot", default="Chennai/Velachery", help="District/Constituency")
+    parser.add_argument("--bulk-size", type=int, default=1000)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--max-inflight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--drain", type=float, default=60, help="seconds to wait for analysis after the run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", help="database the --url server writes to, for lag (default MONGODB_DB)")
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    hotspot = tuple(args.hotspot.split("/", 1)) if args.scenario == "hotspot" else None
+    traffic = Traffic(args.seed, args.skew, args.clients, hotspot)
+    send = bulk_request(traffic, args.bulk_size) if args.scenario == "bulk" else single_request(traffic)
+
+    mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+    if args.launch:
+        db_name = bench_db_name("feedback_load_bench")
+    else:
+        db_name = args.db or os.getenv("MONGODB_DB", "feedback_ai_db")
+    # The synthetic kiosks arrive through X-Forwarded-For from localhost
+    env = dict(os.environ, MONGODB_URI=mongo_uri, MONGODB_DB=db_name, ANALYSIS_MODE="queue",
+               TRUSTED_PROXIES="127.0.0.1")
+
+    from pymongo import MongoClient
+
+    client = MongoClient(mongo_uri)
+    if args.launch:
+        drop_bench_db(client, db_name)
+    since = datetime.now(timezone.utc)
+
+    def drive(url):
+        return asyncio.run(run_open_loop(
+            url, send, args.rate, args.duration, args.max_inflight, args.timeout, args.seed
+        ))
+
+    if args.launch:
+        with launched(args.port, args.workers, env) as url:
+            report = drive(url)
+            report["lag"] = batch_lag(client[db_name], since, args.drain)
+    else:
+        report = drive(args.url)
+        report["lag"] = batch_lag(client[db_name], since, args.drain)
+
+    report = {"scenario": args.scenario, **report}
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
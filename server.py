@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from backend.feedback_service import process_feedback
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from backend.admission import Rejected, admit, charge_records, client_address, stats as admission_stats
+from backend.async_db import jobs
+from backend.change_counter import INSERT_TRACKED, current_async, newest_id_async
+from backend import metrics
+from backend.issue_stream import stream_issue_events
+from backend.read_service import list_feedback, list_issues
+from backend.utils.security import hash_mobile
+from backend.feedback_service import DUPLICATE
+from backend.feedback_service_async import process_feedback_async, process_feedback_bulk_async
 
 app = FastAPI()
 
@@ -14,6 +30,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------- ADMISSION CONTROL ----------------
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": "Too many requests" if exc.status_code == 429 else "Server busy", "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def client_key(request: Request):
+    peer = request.client.host if request.client else None
+    return client_address(peer, request.headers.get("x-forwarded-for"))
+
 # ---------------- REQUEST MODEL ----------------
 class FeedbackRequest(BaseModel):
     district: str
@@ -21,6 +51,7 @@ class FeedbackRequest(BaseModel):
     name: str | None = None
     age: int | None = None
     booth_no: str | None = None
+    mobile_no: str | None = None
     email: str | None = None
     type_of_feedback: str
     feedback_text: str
@@ -29,5 +60,225 @@ class FeedbackRequest(BaseModel):
 
 # ---------------- API ENDPOINT ----------------
 @app.post("/api/feedback")
-def submit_feedback(req: FeedbackRequest):
-    return process_feedback(req.dict())
+async def submit_feedback(req: FeedbackRequest, request: Request):
+    mobile_hash = hash_mobile(req.mobile_no) if req.mobile_no else None
+    async with admit(client_key(request), mobile_hash):
+        return await process_feedback_async(req.dict())
+
+
+# ---------------- BULK NDJSON UPLOAD ----------------
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", 64 * 1024))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", 256 * 1024 * 1024))  # after gunzip
+
+
+def _too_long(line_no):
+    return HTTPException(
+        status_code=400,
+        detail=f"Line {line_no} is longer than {BULK_MAX_LINE_BYTES} bytes"
+    )
+
+
+async def _ndjson_lines(request: Request):
+    """
+    Yields lines from a streamed NDJSON body, gunzipping on the fly if needed.
+    Memory stays bounded: a line over BULK_MAX_LINE_BYTES is a 400 and a
+    body that inflates past BULK_MAX_BYTES (a gzip bomb) is a 413, raised as
+    soon as the limit is crossed. Chunks already written stay stored.
+    """
+    gzipped = (
+        request.headers.get("content-encoding") == "gzip"
+        or "gzip" in request.headers.get("content-type", "")
+    )
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    too_large = HTTPException(status_code=413, detail=f"Body is larger than {BULK_MAX_BYTES} bytes (uncompressed)")
+    total = 0
+    line_no = 0
+    pending = b""
+    async for chunk in request.stream():
+        if decoder:
+            try:
+                # Never inflate past the cap: whatever is left over means the body is too large
+                chunk = decoder.decompress(chunk, BULK_MAX_BYTES - total + 1)
+            except zlib.error:
+                raise HTTPException(status_code=400, detail="Body is not valid gzip")
+            if decoder.unconsumed_tail:
+                raise too_large
+        total += len(chunk)
+        if total > BULK_MAX_BYTES:
+            raise too_large
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if len(line) > BULK_MAX_LINE_BYTES:
+                raise _too_long(line_no)
+            yield line
+        if len(pending) > BULK_MAX_LINE_BYTES:
+            raise _too_long(line_no + 1)
+    if decoder:
+        try:
+            pending += decoder.flush()
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Body is not valid gzip")
+    if len(pending) > BULK_MAX_LINE_BYTES:
+        raise _too_long(line_no + 1)
+    if pending:
+        yield pending
+
+
+@app.post("/api/feedback/bulk")
+async def submit_feedback_bulk(request: Request):
+    """
+    Body: one FeedbackRequest JSON object per line (optionally gzip).
+    Records are validated as they stream in and written in chunks;
+    the response has one accept/reject entry per input line. Every record
+    is charged against the client's and its mobile's rate limits.
+    """
+    key = client_key(request)
+    async with admit(key, per_record=True):
+        return await _bulk_upload(request, key)
+
+
+async def _bulk_upload(request: Request, key):
+    results = []
+    buffer, buffer_lines = [], []
+
+    async def flush():
+        reasons = await charge_records(
+            key, [hash_mobile(r["mobile_no"]) if r.get("mobile_no") else None for r in buffer]
+        )
+        admitted, admitted_lines = [], []
+        for record, line_no, reason in zip(buffer, buffer_lines, reasons):
+            if reason:
+                results.append({"line": line_no, "status": "rejected", "error": f"rate limited ({reason})"})
+            else:
+                admitted.append(record)
+                admitted_lines.append(line_no)
+
+        stored = await process_feedback_bulk_async(admitted)
+        for line_no, (inserted_id, error) in zip(admitted_lines, stored):
+            if error == DUPLICATE:
+                results.append({"line": line_no, "status": "duplicate"})
+            elif error:
+                results.append({"line": line_no, "status": "rejected", "error": error})
+            else:
+                results.append({"line": line_no, "status": "accepted", "id": str(inserted_id)})
+        buffer.clear()
+        buffer_lines.clear()
+
+    line_no = 0
+    async for raw in _ndjson_lines(request):
+        line_no += 1
+        if not raw.strip():
+            continue
+        try:
+            record = FeedbackRequest(**json.loads(raw))
+        except (ValueError, TypeError, ValidationError) as e:
+            results.append({"line": line_no, "status": "rejected", "error": str(e)})
+            continue
+        buffer.append(record.dict())
+        buffer_lines.append(line_no)
+        if len(buffer) >= BULK_CHUNK_SIZE:
+            await flush()
+    if buffer:
+        await flush()
+
+    results.sort(key=lambda r: r["line"])
+    counts = {"accepted": 0, "duplicate": 0, "rejected": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    return {**counts, "results": results}
+
+
+# ---------------- READ API (cursor pages + ETag) ----------------
+async def _conditional(request: Request, collection: str):
+    """
+    Builds ETag / Last-Modified from the collection's change counter and,
+    for insert-heavy collections, its newest _id (both cached in-process),
+    plus the query string. Returns (headers, not_modified).
+    """
+    version, updated_at = await current_async(collection)
+    newest = await newest_id_async(collection) if collection in INSERT_TRACKED else None
+    if newest is not None:
+        updated_at = max(updated_at, newest.generation_time)
+    tag = hashlib.sha1(f"{collection}:{version}:{newest}:{request.url.query}".encode()).hexdigest()[:16]
+    headers = {
+        "ETag": f'W/"{tag}"',
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return headers, headers["ETag"] in [t.strip() for t in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return headers, updated_at.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+    return headers, False
+
+
+async def _read(request: Request, response: Response, collection: str, fetch):
+    headers, not_modified = await _conditional(request, collection)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    try:
+        page = await fetch()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    response.headers.update(headers)
+    return page
+
+
+@app.get("/api/feedback")
+async def get_feedback(request: Request, response: Response,
+                       district: str | None = None, constituency: str | None = None,
+                       category: str | None = None, priority: str | None = None,
+                       since: datetime | None = None, until: datetime | None = None,
+                       cursor: str | None = None, limit: int = 50):
+    return await _read(request, response, "feedbacks", lambda: list_feedback(
+        district, constituency, category, priority, since, until, cursor, limit
+    ))
+
+
+@app.get("/api/issues")
+async def get_issues(request: Request, response: Response,
+                     district: str | None = None, category: str | None = None, priority: str | None = None,
+                     since: datetime | None = None, until: datetime | None = None,
+                     cursor: str | None = None, limit: int = 50):
+    return await _read(request, response, "global_issues", lambda: list_issues(
+        district, category, priority, since, until, cursor, limit
+    ))
+
+
+
+@app.get("/api/stream/issues")
+async def stream_issues(district: str | None = None, category: str | None = None,
+                        last_event_id: str | None = Header(None)):
+    """Server-sent events: analyzed feedback and global issue count / priority changes."""
+    return StreamingResponse(
+        stream_issue_events(district, category, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# --------------------------------------------------
+# Metrics (Prometheus text format)
+# --------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    admission = admission_stats()
+    depth = await jobs.count_documents({"status": {"$in": ["queued", "running"]}})
+    samples = [
+        ("job_queue_depth", "gauge", depth, {}),
+        ("ingest_inflight_requests", "gauge", admission["inflight"], {}),
+        ("batches_processing", "gauge", admission["processing_batches"], {}),
+        ("ingest_admitted_total", "counter", admission["admitted"], {}),
+    ]
+    samples += [("ingest_shed_total", "counter", count, {"reason": reason})
+                for reason, count in admission["shed"].items()]
+    return PlainTextResponse(metrics.render(samples), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,41 @@
+"""
+Shared fixtures. Tests run against mongomock, so no mongod is needed:
+pymongo.MongoClient is swapped out before backend.db creates its client.
+"""
+import os
+
+import pymongo
+import pytest
+
+os.environ["MONGODB_DB"] = "feedback_test"
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+else:
+    pymongo.MongoClient = mongomock.MongoClient
+
+    # pymongo >= 4.10 passes sort= to bulk builders that predate it
+    def _drop_sort(add):
+        def wrapper(self, *args, sort=None, **kwargs):
+            assert sort is None, "mongomock cannot sort single-document bulk updates"
+            return add(self, *args, **kwargs)
+        return wrapper
+
+    _builder = mongomock.collection.BulkOperationBuilder
+    _builder.add_update = _drop_sort(_builder.add_update)
+    _builder.add_replace = _drop_sort(_builder.add_replace)
+
+
+@pytest.fixture
+def mongo():
+    """A fresh, empty test database."""
+    if mongomock is None:
+        pytest.skip("mongomock is not installed")
+    from backend.db import client, DB_NAME
+
+    client.drop_database(DB_NAME)
+    yield client[DB_NAME]
+    client.drop_database(DB_NAME)
@@ -0,0 +1,56 @@
+import asyncio
+import ipaddress
+
+import pytest
+
+from backend import admission
+
+PROXIES = [ipaddress.ip_network("10.0.0.0/8")]
+
+
+def test_forwarded_for_only_from_trusted_proxies():
+    assert admission.client_address("203.0.113.5", "1.2.3.4", PROXIES) == "203.0.113.5"
+    assert admission.client_address("10.0.0.2", "1.2.3.4", PROXIES) == "1.2.3.4"
+    # A client-supplied first hop does not win over the address our proxy saw
+    assert admission.client_address("10.0.0.2", "6.6.6.6, 1.2.3.4, 10.0.0.9", PROXIES) == "1.2.3.4"
+    assert admission.client_address(None, "1.2.3.4", PROXIES) == "unknown"
+
+
+def test_take_n_grants_what_is_left():
+    buckets = admission.TokenBuckets(rate=1, burst=5)
+    assert buckets.take_n("k", 3, now=100.0) == (3, 0)
+    granted, wait = buckets.take_n("k", 3, now=100.0)
+    assert granted == 2 and wait == pytest.approx(1.0)
+    assert buckets.take("k", now=100.0) > 0
+
+
+def test_charge_records_per_record(monkeypatch):
+    monkeypatch.setattr(admission, "_bulk_buckets", admission.TokenBuckets(rate=1e-9, burst=4))
+    monkeypatch.setattr(admission, "_mobile_buckets", admission.TokenBuckets(rate=1e-9, burst=2))
+    reasons = asyncio.run(admission.charge_records("kiosk", ["m1", "m1", "m1", None, "m2"]))
+    assert reasons == [None, None, "mobile_rate", None, "client_rate"]
+
+
+def test_inflight_slot_is_taken_before_awaiting(monkeypatch):
+    monkeypatch.setattr(admission, "MAX_INFLIGHT", 2)
+    monkeypatch.setattr(admission, "_client_buckets", admission.TokenBuckets(rate=1, burst=100))
+
+    async def slow_lag_check():
+        await asyncio.sleep(0.01)
+        return 0
+    monkeypatch.setattr(admission, "processing_batches", slow_lag_check)
+
+    async def request():
+        try:
+            async with admission.admit("c"):
+                await asyncio.sleep(0.05)
+            return "ok"
+        except admission.Rejected as e:
+            return e.reason
+
+    async def burst():
+        return await asyncio.gather(*(request() for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert results.count("ok") == 2 and results.count("inflight") == 3
+    assert admission._inflight["count"] == 0
@@ -0,0 +1,80 @@
+import pytest
+
+from backend.ai_engine import KEYWORD_MATCHER, analyze_feedback
+
+
+# Inputs the old substring matcher got right; whole-word matching must too
+@pytest.mark.parametrize("text, category, priority", [
+    ("Two accidents happened near school junction", "Education", "High"),
+    ("dangerous wires hanging", "Safety", "High"),
+    ("buses never come on time", "Transport", "Low"),
+    ("pipes leaking near the temple", "Water", "Low"),
+    ("power cutting every night", "Electricity", "Low"),
+])
+def test_inflected_keywords(text, category, priority):
+    result = analyze_feedback(text)
+    assert (result["category"], result["priority"]) == (category, priority)
+
+
+@pytest.mark.parametrize("word, canonical", [
+    ("accidents", "accident"),
+    ("buses", "bus"),
+    ("dangerous", "danger"),
+    ("cutting", "cut"),
+    ("tapes", "tapes"),     # -es only after a sibilant, so not "tap"
+    ("taped", "taped"),     # "tap" doubles: "tapped"
+    ("execute", "execute"),
+    ("policy", "policy"),   # not an inflection of "police"
+    ("busy", "busy"),       # nor of "bus"
+    ("training", "training"),
+])
+def test_canonical(word, canonical):
+    assert KEYWORD_MATCHER.canonical(word) == canonical
+
+
+@pytest.mark.parametrize("text", [
+    "policy on ration cards is unclear",
+    "the office is always busy",
+])
+def test_lookalike_words_do_not_match(text):
+    assert analyze_feedback(text)["category"] not in ("Safety", "Transport")
+
+
+def test_whole_words_only():
+    assert analyze_feedback("please execute the plan")["category"] == "Other"
+
+
+def test_phrase_trie_cache(tmp_path):
+    from backend.ai_engine import _TRIE_END, load_phrase_trie
+
+    lexicon = tmp_path / "lexicon.json"
+    lexicon.write_text('{"thanni varala": "water is not coming"}', encoding="utf-8")
+    built = load_phrase_trie(str(lexicon))
+    cache = tmp_path / "lexicon.json.trie.json"
+    assert cache.exists()
+    assert load_phrase_trie(str(lexicon)) == built
+    assert built["thanni"]["varala"][_TRIE_END] == ("water", "is", "not", "coming")
+
+    # A cache for other content (or a tampered one) is rebuilt, not trusted
+    lexicon.write_text('{"kuppai": "garbage"}', encoding="utf-8")
+    assert load_phrase_trie(str(lexicon)) == {"kuppai": {_TRIE_END: ("garbage",)}}
+    cache.write_text("not json", encoding="utf-8")
+    assert load_phrase_trie(str(lexicon)) == {"kuppai": {_TRIE_END: ("garbage",)}}
+
+
+def test_detect_category_batch_matches_per_doc():
+    pytest.importorskip("scipy")
+    from backend.ai_engine import _category_weight_matrix, detect_category_batch, translate_words
+    from benchmarks.corpus import generate_corpus
+
+    texts = list(generate_corpus(2000, seed=11))
+    expected = [analyze_feedback(t)["category"] for t in texts]
+    assert detect_category_batch([translate_words(t) for t in texts]) == expected
+    assert _category_weight_matrix({}) is _category_weight_matrix({})
+
+
+@pytest.mark.parametrize("text", ["no water for 3-days", "no water for 3 days", "no water 3days", "light off 2 weeks"])
+def test_detect_priority_uses_the_analyzer_duration_rule(text):
+    from backend.ai_engine import detect_priority
+
+    assert detect_priority(text) == analyze_feedback(text)["priority"] == "High"
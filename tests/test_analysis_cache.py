@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import analysis_cache
+
+
+def test_cached_results_match_and_are_copies():
+    texts = ["thanni varala 3 days", "road damaged near school", "thanni varala 3 days"]
+    first = analysis_cache.analyze_feedback_batch_cached(texts, use_mongo=False)
+    assert first[0] == first[2] and first[0] is not first[2]
+    first[0]["category"] = "changed"
+    assert analysis_cache.analyze_feedback_batch_cached(texts[:1], use_mongo=False)[0]["category"] != "changed"
+
+
+def test_stats_are_exact_under_threads(mongo):
+    before = analysis_cache.cache_stats()
+    texts = [f"garbage not collected street {i % 40}" for i in range(400)]
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda t: analysis_cache.analyze_feedback_batch_cached([t], use_mongo=True), texts))
+
+    after = analysis_cache.cache_stats()
+    lookups = (after["hits"] - before["hits"]) + (after["misses"] - before["misses"])
+    assert lookups == len(texts)
+    mongo_lookups = (after["mongo_hits"] - before["mongo_hits"]) + (after["mongo_misses"] - before["mongo_misses"])
+    assert mongo_lookups == after["misses"] - before["misses"]
+
+
+def test_both_tiers_count_per_text(mongo):
+    before = analysis_cache.cache_stats()
+    analysis_cache.analyze_feedback_batch_cached(["kuppai per text 1", "kuppai per text 1"], use_mongo=True)
+    after = analysis_cache.cache_stats()
+    assert after["misses"] - before["misses"] == 2
+    assert after["mongo_misses"] - before["mongo_misses"] == 2
+
+
+def test_stats_are_exported_on_metrics():
+    from backend import metrics
+
+    analysis_cache.analyze_feedback_batch_cached(["kuppai exported"], use_mongo=False)
+    text = metrics.render()
+    assert "# TYPE analysis_cache_lookups_total counter" in text
+    assert f'analysis_cache_lookups_total{{result="miss",tier="memory"}} {analysis_cache.cache_stats()["misses"]}' in text
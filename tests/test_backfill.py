@@ -0,0 +1,31 @@
+from backend import backfill
+from backend.db import feedbacks
+
+STALE = {"category": "Other", "priority": "Low", "main_issue": "General Issue", "summary": ""}
+
+
+def _seed():
+    feedbacks.insert_many([
+        {"feedback": {"original_text": "thanni varala 3 days"}, "ai": dict(STALE), "dedupe_key": "a"},
+        {"feedback": {"original_text": "road damaged near school"}, "ai": dict(STALE), "dedupe_key": "b"},
+        {"feedback": {"original_text": "garbage not collected"}, "batch_id": "open", "dedupe_key": "c"},
+    ])
+
+
+def test_reanalyze_skips_unanalyzed_feedback(mongo):
+    _seed()
+    state = backfill.reanalyze("run1", page_size=1, workers=1, max_ops=0, dry_run=False, restart=False)
+    assert (state["processed"], state["changed"]) == (2, 2)
+    assert "ai" not in feedbacks.find_one({"dedupe_key": "c"})
+    assert backfill.checkpoints.find_one({"_id": "run1"})["processed"] == 2
+
+
+def test_dry_run_ignores_and_keeps_checkpoint(mongo):
+    _seed()
+    last = feedbacks.find_one({"dedupe_key": "b"})["_id"]
+    backfill.checkpoints.insert_one({"_id": "run1", "last_id": last, "processed": 2, "phase": "reanalyze"})
+
+    state = backfill.reanalyze("run1", page_size=10, workers=1, max_ops=0, dry_run=True, restart=False)
+    assert (state["processed"], state["changed"]) == (2, 2)
+    assert feedbacks.find_one({"dedupe_key": "a"})["ai"] == STALE
+    assert backfill.checkpoints.find_one({"_id": "run1"})["last_id"] == last
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+
+from backend import batch_scheduler, job_queue
+from backend.batch_settings import DEFAULT_SETTINGS
+from backend.db import batches
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def _batch(age_hours, count, batch_id="b1"):
+    return {"batch_id": batch_id, "district": "Ariyalur", "constituency": "Ariyalur", "status": "collecting",
+            "count": count, "limit": 15, "created_at": NOW - timedelta(hours=age_hours)}
+
+
+def test_flush_reason():
+    assert batch_scheduler.flush_reason(_batch(1, 1), NOW) is None
+    assert batch_scheduler.flush_reason(_batch(DEFAULT_SETTINGS["min_fill_deadline_hours"], 1), NOW) == "min_fill"
+    assert batch_scheduler.flush_reason(_batch(DEFAULT_SETTINGS["min_fill_deadline_hours"], 10), NOW) is None
+    assert batch_scheduler.flush_reason(_batch(DEFAULT_SETTINGS["max_age_hours"], 10), NOW) == "max_age"
+
+
+def test_flush_seals_and_dispatches_once(mongo):
+    batches.insert_many([_batch(100, 10, "old"), _batch(1, 1, "fresh")])
+    assert batch_scheduler.flush_stale_batches(NOW) == ["old"]
+    assert batches.find_one({"batch_id": "old"})["status"] == "processing"
+    assert job_queue.jobs.count_documents({}) == 1
+    assert batch_scheduler.flush_stale_batches(NOW) == []
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import feedback_service, job_queue, worker
+from backend.db import batches, feedbacks, seal_duplicate_collecting_batches
+
+
+def _sealed_batch(batch_id, count, tagged, sealed_ago=0):
+    now = datetime.now(timezone.utc)
+    batches.insert_one({
+        "batch_id": batch_id, "district": "Chennai", "constituency": "Velachery",
+        "status": "processing", "count": count, "limit": count,
+        "created_at": now - timedelta(hours=1), "sealed_at": now - timedelta(seconds=sealed_ago)
+    })
+    for i in range(tagged):
+        feedbacks.insert_one({"batch_id": batch_id, "dedupe_key": f"{batch_id}-{i}"})
+
+
+def test_waits_for_every_slot_holder(mongo):
+    _sealed_batch("b1", count=3, tagged=2)
+    with pytest.raises(feedback_service.BatchNotReady):
+        feedback_service.load_batch_docs("b1")
+
+    feedbacks.insert_one({"batch_id": "b1", "dedupe_key": "b1-2"})
+    assert len(feedback_service.load_batch_docs("b1")) == 3
+
+
+def test_goes_ahead_after_grace(mongo):
+    _sealed_batch("b1", count=3, tagged=2, sealed_ago=feedback_service.BATCH_TAG_GRACE_SECONDS + 1)
+    assert len(feedback_service.load_batch_docs("b1")) == 2
+
+
+def test_worker_defers_without_using_an_attempt(mongo):
+    _sealed_batch("b1", count=3, tagged=2)
+    job_queue.enqueue_batch_analysis("b1")
+
+    worker.worker_loop(poll_interval=0, max_jobs=1)
+    job = job_queue.jobs.find_one({"_id": "analyze_batch:b1"})
+    assert (job["status"], job["attempts"]) == ("queued", 0)
+    assert batches.find_one({"batch_id": "b1"})["status"] == "processing"
+
+
+def test_duplicate_collecting_batches_are_sealed(mongo):
+    now = datetime.now(timezone.utc)
+    batches.insert_many([
+        {"batch_id": f"b{i}", "district": "Chennai", "constituency": "Velachery",
+         "status": "collecting", "count": count, "limit": 15, "created_at": now}
+        for i, count in enumerate([3, 9, 1])
+    ] + [{"batch_id": "solo", "district": "Chennai", "constituency": "Mylapore",
+          "status": "collecting", "count": 2, "limit": 15, "created_at": now}])
+
+    assert sorted(seal_duplicate_collecting_batches()) == ["b0", "b2"]
+    assert [b["batch_id"] for b in batches.find({"status": "collecting"}).sort("batch_id")] == ["b1", "solo"]
+    assert {j["_id"] for j in job_queue.jobs.find()} == {"analyze_batch:b0", "analyze_batch:b2"}
+    assert seal_duplicate_collecting_batches() == []
+
+
+@pytest.fixture
+def mergeable(mongo, monkeypatch):
+    # mongomock cannot run update pipelines or tail the capped event collection
+    monkeypatch.setattr(feedback_service, "PRIORITY_PIPELINE", {"$set": {"priority": "LOW"}})
+    monkeypatch.setattr(feedback_service, "publish_batch_events", lambda docs: None)
+    monkeypatch.setattr(feedback_service, "_indexes_ready", True)
+    _sealed_batch("b1", count=2, tagged=0)
+    feedbacks.insert_many([
+        feedback_service.build_feedback_doc(
+            {"district": "Chennai", "constituency": "Velachery", "name": f"u{i}", "mobile_no": f"98765432{i:02d}",
+             "type_of_feedback": "Complaint", "feedback_text": "Thanni varala 3 days"},
+            batch_id="b1"
+        )
+        for i in range(2)
+    ])
+
+
+def _issue_totals():
+    return {i["issue_key"]: i["total_reports"] for i in feedback_service.global_issues.find()}
+
+
+def _rollup_total():
+    from backend.rollups import feedback_rollups
+
+    return sum(r["count"] for r in feedback_rollups.find())
+
+
+def test_rerunning_a_batch_does_not_double_count(mergeable):
+    job_queue.enqueue_batch_analysis("b1")
+    worker.worker_loop(poll_interval=0, max_jobs=1)
+    totals = _issue_totals()
+    assert sum(totals.values()) == 2
+    reporters = sum(b["count"] for b in feedback_service.issue_reporters.find())
+
+    # A second worker after the lease expired, while the first had not finished
+    batches.update_one({"batch_id": "b1"}, {"$set": {"status": "processing"}})
+    assert feedback_service.analyze_and_store_batch("b1") is True
+    # and a plain retry of the finished job
+    assert feedback_service.analyze_and_store_batch("b1") is True
+
+    assert _issue_totals() == totals
+    assert sum(b["count"] for b in feedback_service.issue_reporters.find()) == reporters
+    assert _rollup_total() == 2
+
+
+def test_lease_is_renewed_while_the_job_runs(mongo):
+    job_queue.enqueue_batch_analysis("b1")
+    job = job_queue.claim("test-worker", lease_seconds=1)
+    with worker.kept_leased(job, lease_seconds=0.06):
+        first = job_queue.jobs.find_one({"_id": job["_id"]})["lease_until"]
+        worker.time.sleep(0.1)
+    assert job_queue.jobs.find_one({"_id": job["_id"]})["lease_until"] != first
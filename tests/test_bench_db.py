@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.bench_db import bench_db_name, drop_bench_db
+
+
+def test_bench_db_ignores_mongodb_db(monkeypatch):
+    monkeypatch.setenv("MONGODB_DB", "feedback_ai_db")
+    monkeypatch.delenv("BENCH_MONGODB_DB", raising=False)
+    assert bench_db_name() == "feedback_bench"
+
+
+def test_refuses_names_without_bench_suffix(monkeypatch):
+    monkeypatch.setenv("BENCH_MONGODB_DB", "feedback_ai_db")
+    with pytest.raises(SystemExit):
+        bench_db_name()
+    with pytest.raises(SystemExit):
+        drop_bench_db(None, "feedback_ai_db")
+
+
+def test_load_test_launch_refuses_a_real_database(monkeypatch):
+    from benchmarks import load_test
+
+    monkeypatch.setenv("BENCH_MONGODB_DB", "feedback_ai_db")
+    monkeypatch.setattr(load_test, "launched", pytest.fail)
+    with pytest.raises(SystemExit):
+        load_test.main(["--launch", "--duration", "0"])
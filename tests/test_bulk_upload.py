@@ -0,0 +1,64 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+class _Request:
+    def __init__(self, body, gzipped=False, chunk=8192):
+        self.body = gzip.compress(body) if gzipped else body
+        self.headers = {"content-encoding": "gzip"} if gzipped else {}
+        self.chunk = chunk
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+
+def _lines(request):
+    async def collect():
+        return [line async for line in server._ndjson_lines(request)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("gzipped", [False, True])
+def test_lines_are_split_across_chunks(gzipped):
+    records = [json.dumps({"n": i}).encode() for i in range(50)]
+    assert _lines(_Request(b"\n".join(records), gzipped, chunk=7)) == records
+
+
+@pytest.mark.parametrize("body", [b"x" * 5000, b"{}\n" + b"x" * 5000 + b"\n{}"])
+def test_overlong_line_is_a_400(monkeypatch, body):
+    monkeypatch.setattr(server, "BULK_MAX_LINE_BYTES", 1024)
+    with pytest.raises(HTTPException) as e:
+        _lines(_Request(body, chunk=512))
+    assert e.value.status_code == 400
+    assert "longer than 1024 bytes" in e.value.detail
+
+
+def test_gzip_bomb_is_a_413_without_inflating_it(monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_BYTES", 1 << 20)
+    bomb = _Request(b"{}\n" * (10 << 20), gzipped=True)
+    assert len(bomb.body) < 100_000
+    with pytest.raises(HTTPException) as e:
+        _lines(bomb)
+    assert e.value.status_code == 413
+
+
+def test_plain_body_over_the_cap_is_a_413(monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_BYTES", 10_000)
+    with pytest.raises(HTTPException) as e:
+        _lines(_Request(b"{}\n" * 10_000))
+    assert e.value.status_code == 413
+
+
+def test_corrupt_gzip_is_a_400():
+    request = _Request(b"{}\n", gzipped=True)
+    request.body = request.body[:10] + b"garbage" * 10
+    with pytest.raises(HTTPException) as e:
+        _lines(request)
+    assert e.value.status_code == 400
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from backend.ai_engine import analyze_feedback_batch
+from backend import classifiers
+
+TEXTS = ["thanni varala 3 days", "road damaged near school", "hospital doctor not available"]
+
+
+def test_backend_selection_at_batch_level():
+    default = analyze_feedback_batch(TEXTS)
+    assert analyze_feedback_batch(TEXTS, backend="keyword") == default
+    assert analyze_feedback_batch(TEXTS, backend=classifiers.KeywordBackend()) == default
+    with pytest.raises(ValueError):
+        analyze_feedback_batch(TEXTS, backend="nope")
+
+
+def test_train_from_label_file(tmp_path):
+    pytest.importorskip("scipy")
+    labels = tmp_path / "labels.jsonl"
+    rows = [
+        {"text": "no water in the tap for days", "category": "Water", "priority": "High"},
+        {"text": "garbage piling up near market", "category": "Sanitation", "priority": "Medium"},
+    ] * 10
+    labels.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    out = tmp_path / "model.npz"
+
+    assert classifiers.main(["train", "--labels", str(labels), "--out", str(out), "--buckets", "1024"]) == 0
+    model = classifiers.NgramBackend.load(str(out))
+    results = analyze_feedback_batch(["water tap dry", "garbage market"], backend=model)
+    assert [r["category"] for r in results] == ["Water", "Sanitation"]
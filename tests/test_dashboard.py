@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+
+from backend import dashboard
+
+
+def _feedback(i, district="Chennai"):
+    return {
+        "user": {"name": f"user{i}"},
+        "location": {"district": district, "constituency": "Velachery"},
+        "feedback": {"original_text": f"text {i}"},
+        "ai": {"category": "Water", "priority": "High", "main_issue": "No supply"},
+        "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+    }
+
+
+@pytest.fixture
+def stored(mongo):
+    mongo["feedbacks"].insert_many([_feedback(i, "Chennai" if i % 2 else "Madurai") for i in range(25)])
+    mongo["feedbacks"].insert_one({"location": {"district": "Chennai"}, "created_at": datetime.now(timezone.utc)})
+    return mongo
+
+
+def test_detail_rows_are_paged_newest_first(stored):
+    assert dashboard.feedback_count({}) == 25
+    first = dashboard.feedback_rows({}, page=0, page_size=10)
+    last = dashboard.feedback_rows({}, page=2, page_size=10)
+    assert [fb["user"]["name"] for fb in first][:2] == ["user24", "user23"]
+    assert len(last) == 5
+    assert dashboard.feedback_count({}, district="Chennai") == 12
+
+
+def test_export_has_every_row_in_scope(stored):
+    openpyxl = pytest.importorskip("openpyxl")
+    out = BytesIO()
+    assert dashboard.write_feedback_export({}, out) == 25
+
+    sheet = openpyxl.load_workbook(out).active
+    rows = list(sheet.values)
+    assert rows[0] == dashboard.DETAIL_COLUMNS
+    assert len(rows) == 26
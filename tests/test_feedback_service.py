@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend import feedback_service
+from backend.db import batches, feedbacks
+
+WHEN = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+FORM = {
+    "district": "Chennai", "constituency": "Velachery", "name": "Test", "mobile_no": "9876543210",
+    "type_of_feedback": "Complaint", "feedback_text": "Thanni varala 3 days",
+}
+
+
+def test_dedupe_key_needs_a_mobile_and_includes_location():
+    key = feedback_service.dedupe_key_for("thanni varala", "m1", "Chennai", "Velachery", WHEN)
+    assert feedback_service.dedupe_key_for("Thanni  varala!", "m1", "Chennai", "Velachery", WHEN) == key
+    assert feedback_service.dedupe_key_for("thanni varala", "m1", "Chennai", "Mylapore", WHEN) != key
+    assert feedback_service.dedupe_key_for("thanni varala", None, "Chennai", "Velachery", WHEN) is None
+    assert "dedupe_key" not in feedback_service.build_feedback_doc({**FORM, "mobile_no": None})
+
+
+@pytest.fixture
+def one_slot_batches(mongo, monkeypatch):
+    """Single-slot allocation without the update pipeline (mongomock cannot run it)."""
+    def allocate(district, constituency, want=1, limit=15):
+        batch = batches.find_one_and_update(
+            {"district": district, "constituency": constituency, "status": "collecting"},
+            {"$inc": {"count": want}, "$setOnInsert": {"batch_id": f"{constituency}-1", "limit": limit}},
+            upsert=True, return_document=True
+        )
+        return {"batch_id": batch["batch_id"], "limit": limit, "taken": want,
+                "count": batch["count"], "sealed": batch["count"] >= limit}
+
+    monkeypatch.setattr(feedback_service, "_indexes_ready", False)  # the dedupe index is in this db
+    monkeypatch.setattr(feedback_service, "allocate_batch_slots", allocate)
+    monkeypatch.setattr(feedback_service, "get_or_create_batch", lambda d, c, limit=15: allocate(d, c, 1, limit))
+
+
+def test_stored_with_batch_id_and_duplicate_gives_slot_back(one_slot_batches):
+    assert "duplicate" not in feedback_service.process_feedback(FORM)
+    assert feedbacks.find_one()["batch_id"] == "Velachery-1"
+
+    assert feedback_service.process_feedback(FORM)["duplicate"] is True
+    assert feedbacks.count_documents({}) == 1
+    assert batches.find_one({"batch_id": "Velachery-1"})["count"] == 1
+
+
+def test_bulk_duplicates_give_slots_back(one_slot_batches):
+    other = {**FORM, "mobile_no": "9000000000"}
+    results = feedback_service.process_feedback_bulk([FORM, FORM, other])
+    assert [err for _, err in results] == [None, feedback_service.DUPLICATE, None]
+    assert feedbacks.count_documents({"batch_id": "Velachery-1"}) == 2
+    assert batches.find_one({"batch_id": "Velachery-1"})["count"] == 2
+
+
+# --------------------------------------------------
+# Slot allocation
+# --------------------------------------------------
+NOW = datetime(2026, 3, 1, 9)
+
+
+def _allocated(mongo, before, want, limit=15):
+    """Runs the allocation pipeline the way the upsert would (as an aggregation; mongomock has no pipeline updates)."""
+    mongo["probe"].insert_one(dict(before or {}, _id=1))
+    return next(mongo["probe"].aggregate(feedback_service.allocation_pipeline("new", want, limit, NOW)))
+
+
+def test_fresh_batch(mongo):
+    after = _allocated(mongo, None, want=3)
+    assert (after["batch_id"], after["count"], after["status"]) == ("new", 3, "collecting")
+    assert feedback_service.allocation_result(None, "new", 3, 15) == {
+        "batch_id": "new", "limit": 15, "slot": 1, "taken": 3, "count": 3, "sealed": False
+    }
+
+
+def test_partial_fill_takes_what_is_left_and_seals(mongo):
+    before = {"batch_id": "b1", "limit": 15, "count": 13, "created_at": NOW}
+    after = _allocated(mongo, before, want=5)
+    assert (after["count"], after["status"], after["sealed_at"]) == (15, "processing", NOW)
+    result = feedback_service.allocation_result(before, "new", 5, 15)
+    assert (result["slot"], result["taken"], result["sealed"]) == (14, 2, True)
+
+
+def test_exact_fill_seals(mongo):
+    before = {"batch_id": "b1", "limit": 15, "count": 14, "created_at": NOW}
+    assert _allocated(mongo, before, want=1)["status"] == "processing"
+    result = feedback_service.allocation_result(before, "new", 1, 15)
+    assert (result["slot"], result["taken"], result["sealed"]) == (15, 1, True)
+
+
+def test_full_legacy_batch_is_sealed_and_dispatched(mongo, monkeypatch):
+    legacy = {"batch_id": "legacy", "limit": 15, "count": 15, "created_at": NOW}
+    assert _allocated(mongo, legacy, want=1)["status"] == "processing"
+    assert feedback_service.allocation_result(legacy, "new", 1, 15) is None
+
+    class Batches:
+        def __init__(self):
+            self.befores = [legacy, None]
+
+        def find_one_and_update(self, *args, **kwargs):
+            return self.befores.pop(0)
+
+    dispatched = []
+    monkeypatch.setattr(feedback_service, "batches", Batches())
+    monkeypatch.setattr(feedback_service, "ensure_service_indexes", lambda: None)
+    monkeypatch.setattr(feedback_service, "dispatch_sealed_batch", dispatched.append)
+
+    result = feedback_service.allocate_batch_slots("Chennai", "Velachery")
+    assert dispatched == ["legacy"]
+    assert (result["slot"], result["taken"], result["sealed"]) == (1, 1, False)
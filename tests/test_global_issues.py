@@ -0,0 +1,21 @@
+from backend.feedback_service import REPORTER_BUCKET_HINT, REPORTER_BUCKET_SIZE, reporter_bucket_ops
+
+
+def _groups(n):
+    return {"water_no_supply": {"users": [{"name": f"u{i}"} for i in range(n)]}}
+
+
+def test_bucket_filter_leaves_room_for_the_whole_chunk():
+    ops = reporter_bucket_ops(_groups(15))
+    assert len(ops) == 1
+    doc = ops[0]._doc
+    assert ops[0]._filter == {"issue_key": "water_no_supply", "count": {"$lte": REPORTER_BUCKET_SIZE - 15}}
+    assert doc["$inc"] == {"count": 15}
+    assert ops[0]._hint == REPORTER_BUCKET_HINT
+
+
+def test_large_group_is_split_into_bucket_sized_chunks():
+    ops = reporter_bucket_ops(_groups(REPORTER_BUCKET_SIZE + 1))
+    assert [op._doc["$inc"]["count"] for op in ops] == [REPORTER_BUCKET_SIZE, 1]
+    assert ops[0]._filter["count"] == {"$lte": 0}
+    assert ops[1]._filter["count"] == {"$lte": REPORTER_BUCKET_SIZE - 1}
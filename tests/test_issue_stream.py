@@ -0,0 +1,73 @@
+import asyncio
+
+from backend import issue_stream
+from backend.issue_stream import Broadcaster, batch_events
+
+
+def _event(seq, district="Chennai"):
+    return {"seq": seq, "type": "feedback", "district": district, "category": "Water", "data": {}}
+
+
+def _subscribed(district=None):
+    broadcaster = Broadcaster()
+    broadcaster.last_seq = 0
+    sub = broadcaster.subscribe(district)
+    return broadcaster, sub
+
+
+def _drain(sub):
+    seqs = []
+    while not sub.queue.empty():
+        seqs.append(sub.queue.get_nowait()["seq"])
+    return seqs
+
+
+def test_late_lower_ids_are_published_in_order():
+    broadcaster, sub = _subscribed()
+    for seq in (3, 4, 1):
+        broadcaster.receive(_event(seq), now=0)
+    assert _drain(sub) == [1]
+    assert broadcaster.last_seq == 1
+
+    broadcaster.receive(_event(2), now=1)
+    assert _drain(sub) == [2, 3, 4]
+    assert broadcaster.last_seq == 4
+    assert [e["seq"] for e in broadcaster.recent] == [1, 2, 3, 4]
+
+
+def test_missing_id_is_skipped_after_the_gap_timeout():
+    broadcaster, sub = _subscribed()
+    broadcaster.receive(_event(2), now=0)
+    broadcaster.expire_gaps(now=issue_stream.STREAM_GAP_TIMEOUT - 1)
+    assert _drain(sub) == []
+
+    broadcaster.expire_gaps(now=issue_stream.STREAM_GAP_TIMEOUT)
+    assert _drain(sub) == [2]
+
+    broadcaster.receive(_event(1), now=10)  # too late: never sent backwards
+    assert _drain(sub) == []
+    assert broadcaster.last_seq == 2
+
+
+def test_replay_stops_at_the_last_published_id():
+    broadcaster, sub = _subscribed()
+    for seq in (1, 2, 4):
+        broadcaster.receive(_event(seq), now=0)
+    replayed = asyncio.run(broadcaster.replay(0, sub))
+    assert [e["seq"] for e in replayed] == [1, 2]  # 4 waits in order behind 3
+
+
+def test_issue_events_carry_the_issue_districts():
+    docs = [{
+        "_id": "f1",
+        "location": {"district": "Madurai", "constituency": "Madurai East"},
+        "ai": {"category": "Water", "main_issue": "No supply", "priority": "High"},
+        "created_at": None,
+    }]
+    issue = {"issue_key": "water_no_supply", "category": "Water", "issue_text": "No supply",
+             "total_reports": 12, "priority": "HIGH", "districts": ["Chennai", "Madurai"]}
+    _, event = batch_events(docs, [issue], {"water_no_supply": 1})
+
+    assert event["district"] == ["Chennai", "Madurai"]
+    assert issue_stream.Subscription("Chennai").matches(event)
+    assert not issue_stream.Subscription("Salem").matches(event)
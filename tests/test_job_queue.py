@@ -0,0 +1,41 @@
+from backend import job_queue
+
+
+def _fail_until_dead(batch_id, attempts):
+    for _ in range(attempts):
+        job = job_queue.claim("test-worker")
+        assert job["payload"] == {"batch_id": batch_id}
+        job_queue.fail(job, RuntimeError("boom"), max_attempts=attempts)
+        # skip the backoff
+        job_queue.jobs.update_one({"_id": job["_id"], "status": "queued"}, {"$set": {"run_at": job["created_at"]}})
+
+
+def test_enqueue_is_idempotent(mongo):
+    assert job_queue.enqueue_batch_analysis("b1") is True
+    assert job_queue.enqueue_batch_analysis("b1") is False
+    assert job_queue.queue_depth() == 1
+
+
+def test_dead_job_fails_its_batch_and_requeue_resets_it(mongo):
+    job_queue.batches.insert_one({"batch_id": "b1", "status": "processing"})
+    job_queue.enqueue_batch_analysis("b1")
+
+    _fail_until_dead("b1", attempts=2)
+    assert job_queue.jobs.find_one({"_id": "analyze_batch:b1"})["status"] == "dead"
+    batch = job_queue.batches.find_one({"batch_id": "b1"})
+    assert batch["status"] == "failed" and batch["error"] == "boom"
+
+    assert job_queue.requeue_dead() == 1
+    job = job_queue.jobs.find_one({"_id": "analyze_batch:b1"})
+    assert (job["status"], job["attempts"]) == ("queued", 0)
+    batch = job_queue.batches.find_one({"batch_id": "b1"})
+    assert batch["status"] == "processing" and "error" not in batch
+
+
+def test_retry_keeps_batch_processing(mongo):
+    job_queue.batches.insert_one({"batch_id": "b2", "status": "processing"})
+    job_queue.enqueue_batch_analysis("b2")
+    job = job_queue.claim("test-worker")
+    job_queue.fail(job, RuntimeError("transient"), max_attempts=3)
+    assert job_queue.jobs.find_one({"_id": job["_id"]})["status"] == "queued"
+    assert job_queue.batches.find_one({"batch_id": "b2"})["status"] == "processing"
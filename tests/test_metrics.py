@@ -0,0 +1,35 @@
+import urllib.request
+
+from backend import metrics
+
+
+def test_histogram_renders_cumulative_buckets(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "_registry", [])
+    hist = metrics.Histogram("test_seconds", "test", ["stage"], buckets=(0.1, 1))
+    hist.observe(0.05, "insert")
+    hist.observe(0.5, "insert")
+    hist.observe(5, "insert")
+
+    lines = hist.render()
+    assert 'test_seconds_bucket{stage="insert",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="insert",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="insert",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="insert"} 3' in lines
+
+
+def test_worker_metrics_served_over_http(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    metrics.ANALYZED_DOCS.inc(15)
+
+    server = metrics.serve(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            body = resp.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE analysis_documents_total counter" in body
+    assert "analysis_documents_total " in body
@@ -0,0 +1,47 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from backend.read_service import decode_cursor, encode_cursor
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "created_at": datetime(2026, 2, 1, 8, 30, tzinfo=timezone.utc)}
+    assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], doc["_id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _b64("no separator"),
+    _b64("yesterday|" + str(ObjectId())),
+    _b64("2026-02-01T08:30:00+00:00|not-an-object-id"),
+    base64.urlsafe_b64encode(b"\xff\xfe|x").decode(),
+])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_district_scoped_issues_exclude_other_districts(mongo):
+    from backend.read_service import issue_query
+
+    issues = mongo["global_issues"]
+    issues.insert_many([
+        {"issue_key": "water", "category": "Water", "districts": ["Chennai", "Madurai"]},
+        {"issue_key": "roads", "category": "Roads", "districts": ["Salem"]},
+        {"issue_key": "power", "category": "Electricity", "districts": ["Chennai"]},
+    ])
+
+    def keys(**filters):
+        return sorted(i["issue_key"] for i in issues.find(issue_query(**filters)))
+
+    assert keys(district="Chennai") == ["power", "water"]
+    assert keys(district="Salem") == ["roads"]
+    assert keys(district="Chennai", category="Water") == ["water"]
+    assert keys() == ["power", "roads", "water"]
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend import dashboard, rollups
+
+
+def test_rebuild_lease_is_exclusive_until_released(mongo):
+    with rollups.rebuild_lease("first"):
+        with pytest.raises(rollups.RebuildInProgress):
+            with rollups.rebuild_lease("second"):
+                pass
+    with rollups.rebuild_lease("third"):
+        pass
+
+
+def test_expired_lease_can_be_taken_over(mongo):
+    mongo["schema_meta"].insert_one(
+        {"_id": "rollups_rebuild", "owner": "crashed", "until": datetime(2020, 1, 1, tzinfo=timezone.utc)}
+    )
+    with rollups.rebuild_lease("next"):
+        assert mongo["schema_meta"].find_one({"_id": "rollups_rebuild"})["owner"] == "next"
+
+
+def test_cli_refuses_while_analysis_jobs_run(mongo, monkeypatch):
+    monkeypatch.setattr(rollups, "rebuild", pytest.fail)
+    mongo["jobs"].insert_one({"_id": "analyze_batch:b1", "kind": "analyze_batch", "status": "running"})
+    assert rollups.main(["rebuild"]) == 1
+    assert not rollups.rollups_built()
+
+
+def test_pending_counts_unbatched_and_failed_feedback(mongo):
+    now = datetime.now(timezone.utc)
+    mongo["feedback_rollups"].insert_one(
+        {"district": "Chennai", "constituency": "Velachery", "category": "Water", "priority": "High",
+         "day": "2026-01-01", "count": 4}
+    )
+    mongo["batches"].insert_many([
+        {"batch_id": "b1", "district": "Chennai", "status": "collecting", "count": 3},
+        {"batch_id": "b2", "district": "Chennai", "status": "failed", "count": 2},
+        {"batch_id": "b3", "district": "Chennai", "status": "completed", "count": 15},
+    ])
+    mongo["feedbacks"].insert_many([
+        {"batch_id": None, "location": {"district": "Chennai"}, "created_at": now},
+        {"location": {"district": "Madurai"}, "created_at": now},
+        {"batch_id": None, "location": {"district": "Chennai"}, "ai": {"category": "Water"}, "created_at": now},
+    ])
+
+    assert dashboard.totals({}) == {"received": 11, "analyzed": 4, "pending": 7}
+    assert dashboard.totals({"district": {"$in": ["Chennai"]}})["pending"] == 6
+    assert dashboard.totals({"district": {"$in": ["Chennai"]}, "category": {"$in": ["Water"]}})["pending"] == 0